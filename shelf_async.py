@@ -0,0 +1,193 @@
+"""
+eBookstore asyncio API
+Runs shelf_db operations on a small pool of database threads so coroutines can await them.
+"""
+
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import shelf_db
+
+DEFAULT_WORKERS = 4
+LIST_PAGE_SIZE = shelf_db.EXPORT_BATCH_SIZE
+PROGRESS_STEPS = 1000  # SQLite VM steps between checks for a cancelled job
+
+_executor = None
+_executor_lock = threading.Lock()
+_job = threading.local()  # the cancel flag of the job running on this worker
+
+
+# -----------------------------
+# Executor
+# -----------------------------
+def start(workers=DEFAULT_WORKERS):
+    """Create the database thread pool; each thread keeps its own connection.
+
+    Called automatically on first use. Any number of coroutines can await
+    operations at once; they queue for the workers rather than each opening
+    a connection.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shelf-db",
+                                           initializer=shelf_db.connect_db)
+        return _executor
+
+
+def shutdown():
+    """Stop the thread pool; each worker's connection closes as its thread exits."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+async def run(func, *args, timeout=None):
+    """Await func(conn, *args) on a database thread.
+
+    If the caller is cancelled or the timeout expires, the job is stopped: a
+    job still queued never runs, a statement in progress is interrupted, later
+    statements are aborted, and an in_transaction job rolls back instead of
+    committing.
+    """
+    cancelled = threading.Event()
+    owner = {"conn": None}  # set while this job is running on a connection
+    owner_lock = threading.Lock()
+
+    def job():
+        conn = shelf_db.connect_db()
+        with owner_lock:
+            if cancelled.is_set():
+                raise sqlite3.OperationalError("interrupted")
+            owner["conn"] = conn
+        _job.cancelled = cancelled
+        conn.set_progress_handler(cancelled.is_set, PROGRESS_STEPS)
+        try:
+            return func(conn, *args)
+        finally:
+            conn.set_progress_handler(None, 0)
+            _job.cancelled = None
+            with owner_lock:
+                owner["conn"] = None
+            if conn.in_transaction:
+                conn.rollback()  # a job must not leave its transaction open
+
+    future = asyncio.get_running_loop().run_in_executor(_executor or start(), job)
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except (asyncio.CancelledError, asyncio.TimeoutError):
+        with owner_lock:
+            cancelled.set()
+            # Only while this job still holds the connection, so the interrupt
+            # cannot land on the next job the worker picks up
+            if owner["conn"] is not None:
+                owner["conn"].interrupt()
+        raise
+
+
+def in_transaction(func):
+    """Wrap a data operation so it commits, or rolls back, on its own.
+
+    If the job was cancelled while the operation ran, it rolls back instead.
+    """
+    def job(conn, *args):
+        with conn:
+            result = func(conn, *args)
+            if getattr(_job, "cancelled", None) and _job.cancelled.is_set():
+                raise sqlite3.OperationalError("interrupted")
+        return result
+    return job
+
+
+# -----------------------------
+# Operations
+# -----------------------------
+async def add_author(name, country, author_id=None, timeout=None):
+    """Add an author and return its ID (auto-assigned if author_id is None)."""
+    return await run(in_transaction(shelf_db.insert_author), author_id, name, country,
+                     timeout=timeout)
+
+
+async def add_book(title, author_id, qty, book_id=None, timeout=None):
+    """Add a book for an existing author and return its ID."""
+    return await run(in_transaction(shelf_db.insert_book), book_id, title, author_id, qty,
+                     timeout=timeout)
+
+
+async def update_book(book_id, title=None, author_id=None, qty=None, timeout=None):
+    """Overwrite the given fields of a book."""
+    await run(in_transaction(shelf_db.edit_book), book_id, title, author_id, qty,
+              timeout=timeout)
+
+
+async def delete_book(book_id, timeout=None):
+    """Delete a book by ID."""
+    await run(in_transaction(shelf_db.remove_book), book_id, timeout=timeout)
+
+
+async def get_book(book_id, timeout=None):
+    """Return (id, title, author, country, qty) for a book, or None."""
+    return await run(shelf_db.fetch_book, book_id, timeout=timeout)
+
+
+async def get_author(author_id, timeout=None):
+    """Return (name, country) for an author, or None."""
+    return await run(lambda conn, a: shelf_db.get_author(a, conn), author_id, timeout=timeout)
+
+
+async def search_books(keyword, limit=100, timeout=None):
+    """Return up to limit (id, title, author, country, qty) rows matching keyword."""
+    def job(conn, keyword, limit):
+        return list(zip(shelf_db.cached_search(keyword, conn), range(limit)))
+    return [row for row, _ in await run(job, keyword, limit, timeout=timeout)]
+
+
+async def autocomplete(prefix, limit=shelf_db.AUTOCOMPLETE_LIMIT, timeout=None):
+    """Return (kind, id, text) suggestions starting with prefix."""
+    return await run(lambda conn, p, n: shelf_db.autocomplete(p, n, conn), prefix, limit,
+                     timeout=timeout)
+
+
+async def sell(basket, timeout=None):
+    """Take each (book ID, quantity) in basket off the shelf in one transaction."""
+    await run(lambda conn, b: shelf_db.sell_items(b), basket, timeout=timeout)
+
+
+async def restock(basket, timeout=None):
+    """Add each (book ID, quantity) in basket to stock in one transaction."""
+    await run(lambda conn, b: shelf_db.restock_items(b), basket, timeout=timeout)
+
+
+# -----------------------------
+# Streaming listings
+# -----------------------------
+async def iter_table(table, page_size=LIST_PAGE_SIZE, timeout=None):
+    """Yield every row of a table in ID order, fetching one keyset page at a time.
+
+    Only one page is held in memory, and the worker is released between pages
+    so other coroutines are not starved by a long listing. timeout applies to
+    each page.
+    """
+    anchor = 0
+    while True:
+        rows = await run(lambda conn, a: shelf_db.fetch_page(table, a, page_size), anchor,
+                         timeout=timeout)
+        for row in rows:
+            yield row
+        if len(rows) < page_size:
+            return
+        anchor = rows[-1][0]
+
+
+def list_books(page_size=LIST_PAGE_SIZE, timeout=None):
+    """Stream (id, title, author, country) for every book."""
+    return iter_table("book", page_size, timeout)
+
+
+def list_authors(page_size=LIST_PAGE_SIZE, timeout=None):
+    """Stream (id, name, country) for every author."""
+    return iter_table("author", page_size, timeout)
@@ -0,0 +1,438 @@
+"""
+eBookstore benchmark suite
+Builds reproducible synthetic catalogs and times each shelf_db operation.
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import shelf_db
+import shelf_writer
+
+# Words used to build titles, including non-ASCII scripts and curly quotes
+TITLE_WORDS = (
+    "Tale", "Cities", "Stone", "Witch", "Wardrobe", "Rings", "Adventures", "Wonderland",
+    "Shadow", "River", "Garden", "Winter", "Empire", "Journey", "Secret", "Mountain",
+    "Café", "Über", "Naïve", "Ångström", "Niño", "Façade", "Smörgåsbord", "Crème",
+    "Ὀδύσσεια", "Война", "Мир", "東京", "物語", "سفر", "Alice’s", "O’Brien’s",
+)
+FIRST_NAMES = ("Anna", "José", "Zoë", "Björn", "Chidi", "Mei", "Ivan", "Saoirse", "Omar", "Léa")
+LAST_NAMES = ("Smith", "Müller", "García", "Nakamura", "Okafor", "Ivanova", "Dubois", "Kowalski")
+COUNTRIES = ("England", "Ireland", "France", "Germany", "Japan", "Nigeria", "Russia", "Spain")
+
+FIRST_BENCH_AUTHOR_ID = 100000
+FIRST_BENCH_BOOK_ID = 1000000
+BOOKS_PER_AUTHOR = 20
+GENERATE_BATCH_SIZE = 10000
+WRITE_PRODUCERS = 8
+CONCURRENT_READERS = 4
+
+# Exports run in a child process on the durable profile, which has no mmap,
+# so peak RSS counts only what the export allocates. Between the smallest and
+# largest catalog it may grow by the page cache filling up to cache_size (in
+# KiB when negative), plus a little; anything more is not flat.
+EXPORT_RSS_SLACK_MB = -shelf_db.PROFILES["durable"]["cache_size"] / 1024 + 4
+EXPORT_CHILD = """
+import sys
+import shelf_db
+shelf_db.DB_FILE = sys.argv[1]
+shelf_db.export_catalog(sys.argv[2])
+try:
+    # Linux keeps ru_maxrss across exec, so it would include the parent's
+    # peak; VmHWM belongs to this process alone
+    with open("/proc/self/status") as f:
+        print(next(line.split()[1] for line in f if line.startswith("VmHWM:")))
+except OSError:
+    try:
+        import resource
+    except ImportError:
+        print("unmeasured")  # e.g. Windows: no way to read peak RSS
+    else:
+        print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024)  # bytes on macOS
+"""
+
+
+# -----------------------------
+# Synthetic catalog
+# -----------------------------
+def make_authors(rng, count):
+    """Yield author rows with reproducible names and countries."""
+    for n in range(count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {n}"
+        yield FIRST_BENCH_AUTHOR_ID + n, name, rng.choice(COUNTRIES)
+
+
+def make_books(rng, count, author_count):
+    """Yield book rows whose authors follow a skewed (Zipf-like) distribution."""
+    # Cumulative once, so each pick is a bisect rather than a pass over all authors
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) ** 1.1 for rank in range(author_count)))
+    ranks = range(author_count)
+    for n in range(count):
+        title = " ".join(rng.choices(TITLE_WORDS, k=rng.randint(2, 6)))
+        author_id = FIRST_BENCH_AUTHOR_ID + rng.choices(ranks, cum_weights=cum_weights)[0]
+        yield FIRST_BENCH_BOOK_ID + n, title, author_id, rng.randint(0, 200)
+
+
+def build_catalog(path, books, seed):
+    """Generate a catalog at path unless it exists; return a fresh copy to benchmark.
+
+    The generated file is never written after it is built, so every run, on
+    any commit, starts from the same data.
+    """
+    if not os.path.exists(path):
+        building = path + ".building"
+        remove_db(building)
+        shelf_db.DB_FILE = building
+        shelf_db.setup_db()
+        rng = random.Random(seed)
+        authors = max(1, books // BOOKS_PER_AUTHOR)
+        conn = shelf_db.connect_db()
+        for table, rows in (("author", make_authors(rng, authors)),
+                            ("book", make_books(rng, books, authors))):
+            for batch in shelf_db.chunked(rows, GENERATE_BATCH_SIZE):
+                with conn:
+                    conn.executemany(shelf_db.INSERT_SQL[table], batch)
+        conn.execute("ANALYZE")
+        shelf_db.close_db()  # the last connection to close folds the WAL back in
+        os.replace(building, path)
+    work = os.path.splitext(path)[0] + ".run.db"
+    remove_db(work)
+    shutil.copyfile(path, work)
+    shelf_db.DB_FILE = work
+    shelf_db.reset_completions()
+    shelf_db.setup_db()  # brings a catalog generated by an older commit up to date
+    return work
+
+
+def remove_db(path):
+    """Delete a database file and its WAL and shared-memory files if present."""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+# -----------------------------
+# Timing
+# -----------------------------
+def percentiles(samples):
+    """Return p50/p95/p99 and mean of samples, in milliseconds."""
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+        "p50_ms": round(cuts[49] * 1000, 4),
+        "p95_ms": round(cuts[94] * 1000, 4),
+        "p99_ms": round(cuts[98] * 1000, 4),
+    }
+
+
+def time_calls(calls):
+    """Run each zero-argument callable and return its durations in seconds."""
+    samples = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run_operations(books, ops, seed):
+    """Time every operation against the current catalog and return the stats."""
+    rng = random.Random(seed + 1)
+    authors = max(1, books // BOOKS_PER_AUTHOR)
+    book_ids = [FIRST_BENCH_BOOK_ID + rng.randrange(books) for _ in range(ops)]
+    author_ids = [FIRST_BENCH_AUTHOR_ID + rng.randrange(authors) for _ in range(ops)]
+    keywords = [rng.choice(TITLE_WORDS + LAST_NAMES) for _ in range(ops)]
+    added = []
+
+    def add(author_id):
+        added.append(shelf_db.add_book("Benchmark Title", author_id, 1))
+
+    def update(book_id):
+        shelf_db.update_book(book_id, qty=rng.randint(0, 200))
+
+    def delete(book_id):
+        shelf_db.delete_book(book_id)
+
+    def search(keyword):
+        cur = shelf_db.search_catalog(conn.cursor(), keyword)
+        for _ in shelf_db.iter_rows(cur):
+            pass
+
+    def cold_start():
+        shelf_db.close_db()
+        shelf_db.setup_db()
+
+    results = {}
+    results["startup"] = time_calls(cold_start for _ in range(ops))
+    conn = shelf_db.connect_db()
+    results["add_book"] = time_calls(lambda a=a: add(a) for a in author_ids)
+    results["update_book"] = time_calls(lambda b=b: update(b) for b in book_ids)
+    results["delete_book"] = time_calls(lambda b=b: delete(b) for b in list(added))
+    results["search_books"] = time_calls(lambda k=k: search(k) for k in keywords)
+    results["search_id"] = time_calls(lambda b=b: search(str(b)) for b in book_ids)
+    results["search_id_prefix"] = time_calls(lambda b=b: search(str(b)[:5]) for b in book_ids)
+    results["view_all_books"] = time_calls(
+        lambda b=b: shelf_db.fetch_page("book", b) for b in book_ids)
+    results["view_all_authors"] = time_calls(
+        lambda a=a: shelf_db.fetch_page("author", a) for a in author_ids)
+    shelf_db.restock_items([(b, 1) for b in book_ids])  # so no sale runs out of stock
+    results["sell_items"] = time_calls(lambda b=b: shelf_db.sell_items([(b, 1)]) for b in book_ids)
+    return {name: percentiles(samples) for name, samples in results.items()}
+
+
+def run_producers(work, chunks):
+    """Run work(chunk) on one thread per chunk and return the elapsed seconds."""
+    threads = [threading.Thread(target=work, args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def write_throughput(books, writes, seed, producers=WRITE_PRODUCERS):
+    """Compare stock updates per second: a commit per update against group commit."""
+    rng = random.Random(seed + 2)
+    book_ids = [FIRST_BENCH_BOOK_ID + rng.randrange(books) for _ in range(writes)]
+    chunks = [book_ids[n::producers] for n in range(producers)]
+
+    def commit_per_op(chunk):
+        for book_id in chunk:
+            shelf_db.update_book(book_id, qty=book_id % 200)
+
+    def group_commit(chunk):
+        futures = [writer.update_book(book_id, qty=book_id % 200) for book_id in chunk]
+        for future in futures:
+            future.result()
+
+    results = {"commit_per_op": writes / run_producers(commit_per_op, chunks)}
+    with shelf_writer.WriteQueue() as writer:
+        results["group_commit"] = writes / run_producers(group_commit, chunks)
+    return {name: round(rate) for name, rate in results.items()}
+
+
+def concurrent_sales(books, sales, seed, sellers=WRITE_PRODUCERS):
+    """Sell one book from many threads at once; return sales/sec.
+
+    Raises AssertionError if the final stock does not match the units sold,
+    i.e. if any sale was lost.
+    """
+    book_id = FIRST_BENCH_BOOK_ID + random.Random(seed + 3).randrange(books)
+    shelf_db.restock_items([(book_id, sales)])
+    before = shelf_db.get_book_record(book_id)[2]
+    sold = [0] * sellers
+
+    def seller(n):
+        for _ in range(sales // sellers):
+            shelf_db.sell_items([(book_id, 1)])
+            sold[n] += 1
+        shelf_db.close_db()
+
+    elapsed = run_producers(seller, range(sellers))
+    after = shelf_db.get_book_record(book_id)[2]
+    if after != before - sum(sold):
+        raise AssertionError(f"Lost updates: stock went from {before} to {after} "
+                             f"after {sum(sold)} sales.")
+    return round(sum(sold) / elapsed)
+
+
+def connection_reuse(books, ops, seed):
+    """Compare lookups per second on a new connection per call and on a reused one."""
+    rng = random.Random(seed + 4)
+    book_ids = [FIRST_BENCH_BOOK_ID + rng.randrange(books) for _ in range(ops)]
+
+    def new_connection(book_id):
+        shelf_db.close_db()
+        shelf_db.get_book(book_id)
+
+    results = {}
+    for name, lookup in (("new_connection", new_connection),
+                         ("reused_connection", shelf_db.get_book)):
+        results[name] = round(ops / sum(time_calls(lambda b=b: lookup(b) for b in book_ids)))
+    return results
+
+
+def profile_concurrency(books, seconds, seed, readers=CONCURRENT_READERS):
+    """Run readers paging and looking up books against one writer, under each profile.
+
+    Returns {profile: {"reads": per sec, "writes": per sec}}. Every thread opens
+    its own connection, so each picks up the profile being measured.
+    """
+    saved = os.environ.get("SHELF_TRACK_PROFILE")
+    results = {}
+    try:
+        for profile in shelf_db.PROFILES:
+            os.environ["SHELF_TRACK_PROFILE"] = profile
+            done = [0] * (readers + 1)  # per thread, so no increment is lost
+            deadline = time.perf_counter() + seconds
+
+            def reader(n):
+                rng = random.Random(seed + 5 + n)
+                while time.perf_counter() < deadline:
+                    book_id = FIRST_BENCH_BOOK_ID + rng.randrange(books)
+                    shelf_db.get_book(book_id)
+                    shelf_db.fetch_page("book", book_id)
+                    done[n] += 2
+                shelf_db.close_db()
+
+            def writer(n):
+                rng = random.Random(seed + 5 + n)
+                while time.perf_counter() < deadline:
+                    book_id = FIRST_BENCH_BOOK_ID + rng.randrange(books)
+                    shelf_db.update_book(book_id, qty=rng.randint(0, 200))
+                    done[n] += 1
+                shelf_db.close_db()
+
+            run_producers(lambda n: (writer if n == readers else reader)(n), range(readers + 1))
+            results[profile] = {"reads": round(sum(done[:readers]) / seconds),
+                                "writes": round(done[readers] / seconds)}
+    finally:
+        if saved is None:
+            os.environ.pop("SHELF_TRACK_PROFILE", None)
+        else:
+            os.environ["SHELF_TRACK_PROFILE"] = saved
+    return results
+
+
+def export_memory(path, db_dir):
+    """Export the catalog at path in a fresh process; return its peak RSS in MB.
+
+    Returns None only if the platform cannot report peak RSS; a failed export
+    raises RuntimeError with the child's error output.
+    """
+    out = os.path.join(db_dir, "shelf_bench_export.csv")
+    env = dict(os.environ, SHELF_TRACK_PROFILE="durable")
+    try:
+        child = subprocess.run([sys.executable, "-c", EXPORT_CHILD, path, out], env=env,
+                               capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    finally:
+        if os.path.exists(out):
+            os.remove(out)
+    if child.returncode != 0:
+        raise RuntimeError(f"Export of {path} failed:\n{child.stderr.strip()}")
+    peak = child.stdout.split()[-1]
+    return None if peak == "unmeasured" else round(int(peak) / 1024, 1)
+
+
+def check_export_memory(sizes):
+    """Raise AssertionError if export peak RSS grew with catalog size."""
+    measured = {int(books): mb for books, mb in sizes.items() if mb is not None}
+    if len(measured) < 2:
+        return
+    smallest, largest = min(measured), max(measured)
+    growth = measured[largest] - measured[smallest]
+    if growth > EXPORT_RSS_SLACK_MB:
+        raise AssertionError(f"Export peak RSS grew {growth:.1f} MB from {smallest} to "
+                             f"{largest} books; it should stay flat.")
+
+
+# -----------------------------
+# Reporting
+# -----------------------------
+def git_commit():
+    """Return the current git commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    """Print a latency table, with the p50 change against a baseline if given."""
+    for size, operations in report["results"].items():
+        print(f"\n{size} books ------------------------------------------------")
+        print(f"{'operation':<18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'vs base':>10}")
+        for name, stats in operations.items():
+            change = ""
+            old = (baseline or {}).get("results", {}).get(size, {}).get(name)
+            if old and old["p50_ms"]:
+                change = f"{stats['p50_ms'] / old['p50_ms']:.2f}x"
+            print(f"{name:<18}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}"
+                  f"{stats['p99_ms']:>10.3f}{change:>10}")
+        rates = report.get("throughput", {}).get(size)
+        if rates:
+            print(f"\n{'throughput':<18}{'ops/s':>10}{'':>20}{'vs base':>10}")
+            for name, rate in rates.items():
+                change = ""
+                old = (baseline or {}).get("throughput", {}).get(size, {}).get(name)
+                if old:
+                    change = f"{rate / old:.2f}x"
+                print(f"{name:<18}{rate:>10}{'':>20}{change:>10}")
+        profiles = report.get("concurrency", {}).get(size)
+        if profiles:
+            print(f"\n{'profile':<18}{'reads/s':>10}{'writes/s':>10}")
+            for name, rates in profiles.items():
+                print(f"{name:<18}{rates['reads']:>10}{rates['writes']:>10}")
+        rss = report.get("export_rss_mb", {}).get(size)
+        if rss is not None:
+            print(f"\nexport peak RSS: {rss} MB")
+
+
+def main(argv=None):
+    """Build catalogs, time the operations and save the results as JSON."""
+    parser = argparse.ArgumentParser(description="Benchmark shelf_db operations.")
+    parser.add_argument("--books", type=int, nargs="+", default=[10000, 100000],
+                        help="catalog sizes to test, e.g. 10000 100000 1000000")
+    parser.add_argument("--ops", type=int, default=200, help="timed calls per operation")
+    parser.add_argument("--writes", type=int, default=2000,
+                        help="stock updates for the write throughput test, and sales "
+                             "for the concurrent sellers test")
+    parser.add_argument("--seconds", type=float, default=3.0,
+                        help="duration of each profile's reader/writer run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db-dir", default=tempfile.gettempdir(),
+                        help="where generated catalogs are kept and reused")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "profile": os.environ.get("SHELF_TRACK_PROFILE", shelf_db.DEFAULT_PROFILE),
+        "seed": args.seed,
+        "ops": args.ops,
+        "results": {},
+        "throughput": {},
+        "concurrency": {},
+        "export_rss_mb": {},
+    }
+    for books in args.books:
+        path = build_catalog(os.path.join(args.db_dir, f"shelf_bench_{books}_{args.seed}.db"),
+                             books, args.seed)
+        size = str(books)
+        report["results"][size] = run_operations(books, args.ops, args.seed)
+        report["throughput"][size] = write_throughput(books, args.writes, args.seed)
+        report["throughput"][size]["concurrent_sales"] = concurrent_sales(books, args.writes, args.seed)
+        report["throughput"][size].update(connection_reuse(books, args.ops, args.seed))
+        report["concurrency"][size] = profile_concurrency(books, args.seconds, args.seed)
+        report["export_rss_mb"][size] = export_memory(path, args.db_dir)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"\nResults saved to {args.output}.")
+    check_export_memory(report["export_rss_mb"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1578 @@
+"""
+eBookstore data access
+Schema, queries, caches and services shared by the menu, CLI and other front ends.
+"""
+
+import atexit
+import bisect
+import csv
+import itertools
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+DB_FILE = "ebookstore.db"
+STATEMENT_CACHE_SIZE = 256
+
+# PRAGMA settings applied to every new connection, chosen by SHELF_TRACK_PROFILE.
+# WAL lets clerks keep reading while another terminal writes.
+PROFILES = {
+    "durable": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+    },
+    "balanced": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+    "fast-bulk": {
+        "busy_timeout": 10000,
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -128000,
+        "mmap_size": 1073741824,
+        "temp_store": "MEMORY",
+    },
+}
+DEFAULT_PROFILE = "balanced"
+
+# Bulk import: rows per transaction, and the insert used for each table
+IMPORT_BATCH_SIZE = 5000
+INSERT_SQL = {
+    "book": "INSERT INTO book (id, title, author_id, qty, title_key)"
+            " VALUES (?1, ?2, ?3, ?4, normalize_key(?2))",
+    "author": "INSERT INTO author (id, name, country, name_key)"
+              " VALUES (?1, ?2, ?3, normalize_key(?2))",
+}
+
+# Migrations: rows per batch for online backfills, and rough seconds per book
+# row for each migration, used by "migrate --dry-run" to estimate duration
+MIGRATION_BATCH_SIZE = 10000
+MIGRATION_COST = {
+    "create_indexes": 3e-6,
+    "setup_fts": 8e-6,
+    "setup_trigrams": 1e-5,
+    "add_search_keys": 2e-5,
+}
+
+# Secondary indexes, created by the create_indexes migration
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_book_author_id ON book (author_id)",
+    "CREATE INDEX IF NOT EXISTS idx_author_country ON author (country)",
+)
+
+# IDs: clerks may type legacy 4-digit IDs or longer ones; new IDs are
+# allocated from id_sequence starting at FIRST_ALLOCATED_ID.
+ID_MIN_DIGITS = 4
+ID_MAX_DIGITS = 12
+FIRST_ALLOCATED_ID = 10000
+
+# Streaming export: rows fetched per round trip and fixed-width column layout
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = ("id", "title", "author", "country", "qty")
+TEXT_WIDTHS = (10, 50, 30, 20, 8)
+
+# Columns returned by every book search, in EXPORT_COLUMNS order
+BOOK_COLUMNS = "book.id, book.title, author.name, author.country, book.qty"
+
+# Columns an update may change, or check against the values last read
+EDITABLE_COLUMNS = {"book": ("title", "author_id", "qty"), "author": ("name", "country")}
+
+# Rows shown per page when browsing books or authors
+PAGE_SIZE = 10
+
+# Query instrumentation: statements slower than SHELF_TRACK_SLOW_MS go to the
+# slow-query log at SHELF_TRACK_SLOW_LOG; SHELF_TRACK_QUERY_STATS=1 prints the
+# summary on exit.
+SLOW_QUERY_MS = float(os.environ.get("SHELF_TRACK_SLOW_MS", 200))
+SLOW_QUERY_LOG = os.environ.get("SHELF_TRACK_SLOW_LOG", "slow_queries.log")
+
+# Per-statement totals: normalized SQL -> [count, total secs, max secs, rows]
+QUERY_STATS = {}
+_stats_lock = threading.Lock()
+
+# Authors looked up by ID are kept in a bounded LRU shared by all threads.
+# Writes made here drop their entry at once. Writes from other connections are
+# noticed by checking author_generation, which only author writes bump, at
+# most every AUTHOR_CACHE_RECHECK seconds per connection and only when
+# PRAGMA data_version shows another connection has committed.
+AUTHOR_CACHE_SIZE = 10000
+AUTHOR_CACHE_RECHECK = 1.0
+_author_cache = OrderedDict()  # author ID -> (name, country)
+_author_cache_lock = threading.Lock()
+_author_cache_generation = {"value": None}  # (database, author_generation) the entries match
+AUTHOR_CACHE_STATS = {"hits": 0, "misses": 0}
+
+# Search results are cached per normalized keyword until the catalog changes
+# (catalog_generation moves on) or the entry is older than the TTL. Results
+# longer than SEARCH_CACHE_MAX_ROWS are streamed rather than cached.
+SEARCH_CACHE_SIZE = 256
+SEARCH_CACHE_TTL = 300.0
+SEARCH_CACHE_MAX_ROWS = 500
+_search_cache = OrderedDict()  # keyword -> (generation, expiry time, rows)
+_search_cache_lock = threading.Lock()
+SEARCH_CACHE_STATS = {"hits": 0, "misses": 0}
+
+# Autocomplete keeps every title and author name in a sorted in-memory list.
+# It is built on first use and updated as this process commits writes.
+# Changes made by other terminals are picked up by a rebuild, checked at most
+# every AUTOCOMPLETE_REFRESH seconds and run only if name_generation (bumped by
+# title and name writes, not stock changes) has moved. A rebuild loads the new
+# list without holding _completions_lock and then swaps it in.
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_REFRESH = 60.0
+_completions = {
+    "keys": [],        # sorted (folded text, kind, ID) tuples
+    "text": {},        # (kind, ID) -> (folded text, display text)
+    "built": None,     # time.monotonic() of the last build or check, None if not built
+    "generation": None,  # name_generation the list was built from
+    "replay": None,    # changes committed during a rebuild, None when not rebuilding
+}
+_completions_lock = threading.Lock()  # guards _completions; held only briefly
+_rebuild_lock = threading.Lock()      # one rebuild at a time
+
+# Fuzzy search ranks candidates from the trigram index, then checks at most
+# FUZZY_CANDIDATES of them for edit distance in Python
+FUZZY_CANDIDATES = 50
+FUZZY_LIMIT = 10
+
+# Each thread keeps one open connection and reuses it for every operation.
+_local = threading.local()
+
+
+# -----------------------------
+# Database helpers
+# -----------------------------
+def connect_db():
+    """Return this thread's database connection, opening it on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == DB_FILE:
+        try:
+            conn.total_changes  # raises if the connection was closed
+            return conn
+        except sqlite3.ProgrammingError:
+            pass
+    close_db()
+    conn = sqlite3.connect(DB_FILE, cached_statements=STATEMENT_CACHE_SIZE,
+                           factory=TimedConnection)
+    conn.create_function("normalize_key", 1, normalize_key, deterministic=True)
+    apply_profile(conn, os.environ.get("SHELF_TRACK_PROFILE", DEFAULT_PROFILE))
+    _local.conn, _local.path = conn, DB_FILE
+    return conn
+
+
+def apply_profile(conn, profile):
+    """Apply the named PRAGMA profile to a connection."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile '{profile}'. Choose from: {', '.join(PROFILES)}.")
+    for pragma, value in PROFILES[profile].items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+
+def close_db():
+    """Close this thread's database connection if one is open."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+    _local.conn = None
+
+
+atexit.register(close_db)
+
+
+def setup_db():
+    """Bring the schema up to date, seeding sample data on a brand-new file.
+
+    A current database costs a single PRAGMA user_version read.
+    """
+    with connect_db() as conn:
+        cur = conn.cursor()
+        version = cur.execute("PRAGMA user_version").fetchone()[0]
+        if version == len(MIGRATIONS):
+            return
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'book'")
+        fresh = version == 0 and cur.fetchone() is None
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TEXT NOT NULL,
+                seconds REAL NOT NULL
+            )
+        """)
+        for number, migration in enumerate(MIGRATIONS[version:], version + 1):
+            start = time.perf_counter()
+            migration(cur)
+            cur.execute(
+                "INSERT OR REPLACE INTO schema_migrations VALUES (?, ?, datetime('now'), ?)",
+                (number, migration.__name__, time.perf_counter() - start)
+            )
+            cur.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        if fresh:
+            seed_sample_data(cur)
+        conn.commit()
+
+
+def pending_migrations():
+    """Return (version, name, estimated seconds) for each migration not yet run.
+
+    Estimates scale MIGRATION_COST by the current number of books.
+    """
+    cur = connect_db().cursor()
+    version = cur.execute("PRAGMA user_version").fetchone()[0]
+    books = 0
+    if cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'book'").fetchone():
+        books = cur.execute("SELECT COUNT(*) FROM book").fetchone()[0]
+    return [
+        (number, migration.__name__, books * MIGRATION_COST.get(migration.__name__, 0))
+        for number, migration in enumerate(MIGRATIONS[version:], version + 1)
+    ]
+
+
+def run_in_batches(cur, table, statement, batch_size=MIGRATION_BATCH_SIZE):
+    """Run statement over table one ID range at a time, committing after each.
+
+    statement must only touch rows with :lo < id <= :hi and be safe to repeat,
+    so an interrupted migration can simply run again. Other terminals wait for
+    one batch at most, never for the whole table.
+    """
+    lo = cur.execute(f"SELECT MIN(id) - 1 FROM {table}").fetchone()[0]
+    while lo is not None:
+        hi = cur.execute(
+            f"SELECT MAX(id) FROM (SELECT id FROM {table} WHERE id > ? ORDER BY id LIMIT ?)",
+            (lo, batch_size)
+        ).fetchone()[0]
+        if hi is None:
+            return
+        cur.execute(statement, {"lo": lo, "hi": hi})
+        cur.connection.commit()
+        lo = hi
+
+
+def create_tables(cur):
+    """Create the author and book tables."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS author (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            country TEXT NOT NULL
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS book (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            author_id INTEGER NOT NULL,
+            qty INTEGER NOT NULL,
+            FOREIGN KEY (author_id) REFERENCES author(id)
+        )
+    """)
+
+
+def create_indexes(cur):
+    """Create the secondary indexes."""
+    for statement in INDEXES:
+        cur.execute(statement)
+
+
+def seed_sample_data(cur):
+    """Populate a new database with a few sample authors and books."""
+    authors = [
+        (1290, "J.K. Rowling", "England"),
+        (8937, "Charles Dickens", "England"),
+        (2356, "C.S. Lewis", "Ireland"),
+        (6380, "J.R.R. Tolkien", "South Africa"),
+        (5620, "Lewis Carroll", "England")
+    ]
+    cur.executemany(INSERT_SQL["author"], authors)
+    books = [
+        (3001, "A Tale of Two Cities", 8937, 30),
+        (3002, "Harry Potter and the Philosopher's Stone", 1290, 40),
+        (3003, "The Lion, the Witch and the Wardrobe", 2356, 25),
+        (3004, "The Lord of the Rings", 6380, 37),
+        (3005, "Alice’s Adventures in Wonderland", 5620, 12)
+    ]
+    cur.executemany(INSERT_SQL["book"], books)
+
+
+def setup_id_sequence(cur):
+    """Create the ID allocator, starting each sequence past the highest used ID."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS id_sequence (
+            name TEXT PRIMARY KEY,
+            next_id INTEGER NOT NULL
+        )
+    """)
+    for table in ("book", "author"):
+        cur.execute(f"""
+            INSERT OR IGNORE INTO id_sequence (name, next_id)
+            SELECT ?, MAX(?, COALESCE(MAX(id), 0) + 1) FROM {table}
+        """, (table, FIRST_ALLOCATED_ID))
+
+
+def reserve_ids(table, count=1):
+    """Reserve count consecutive new IDs for table and return the first one.
+
+    The block is taken in a single UPDATE, so concurrent importers never get
+    overlapping ranges. It also skips past any ID a clerk typed by hand.
+    Inside an open transaction the reservation commits with that transaction.
+    """
+    if table not in ("book", "author"):
+        raise ValueError("Table must be 'book' or 'author'.")
+    conn = connect_db()
+    in_transaction = conn.in_transaction
+    cur = conn.execute(f"""
+        UPDATE id_sequence
+        SET next_id = MAX(next_id, (SELECT COALESCE(MAX(id), 0) + 1 FROM {table})) + ?
+        WHERE name = ?
+        RETURNING next_id - ?
+    """, (count, table, count))
+    first_id = cur.fetchone()[0]
+    cur.close()
+    if not in_transaction:
+        conn.commit()
+    return first_id
+
+
+def setup_generation(cur):
+    """Create a counter that triggers bump on every catalog write."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS catalog_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+    """)
+    cur.execute("INSERT OR IGNORE INTO catalog_generation VALUES (1, 0)")
+    for table in ("book", "author"):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_generation
+                AFTER {event} ON {table} BEGIN
+                    UPDATE catalog_generation SET generation = generation + 1 WHERE id = 1;
+                END
+            """)
+
+
+def setup_trigrams(cur):
+    """Create a trigram index over titles and author names for fuzzy search.
+
+    Row IDs are book ID * 2 for titles and author ID * 2 + 1 for names.
+    """
+    try:
+        cur.execute("CREATE VIRTUAL TABLE IF NOT EXISTS name_trigrams USING fts5(text, tokenize='trigram')")
+    except sqlite3.OperationalError:
+        return  # needs SQLite 3.34+; fuzzy search reports it is unavailable
+    cur.executescript("""
+        CREATE TRIGGER IF NOT EXISTS book_trigrams_insert AFTER INSERT ON book BEGIN
+            INSERT INTO name_trigrams (rowid, text) VALUES (new.id * 2, new.title);
+        END;
+        CREATE TRIGGER IF NOT EXISTS book_trigrams_update AFTER UPDATE OF id, title ON book BEGIN
+            DELETE FROM name_trigrams WHERE rowid = old.id * 2;
+            INSERT INTO name_trigrams (rowid, text) VALUES (new.id * 2, new.title);
+        END;
+        CREATE TRIGGER IF NOT EXISTS book_trigrams_delete AFTER DELETE ON book BEGIN
+            DELETE FROM name_trigrams WHERE rowid = old.id * 2;
+        END;
+        CREATE TRIGGER IF NOT EXISTS author_trigrams_insert AFTER INSERT ON author BEGIN
+            INSERT INTO name_trigrams (rowid, text) VALUES (new.id * 2 + 1, new.name);
+        END;
+        CREATE TRIGGER IF NOT EXISTS author_trigrams_update AFTER UPDATE OF id, name ON author BEGIN
+            DELETE FROM name_trigrams WHERE rowid = old.id * 2 + 1;
+            INSERT INTO name_trigrams (rowid, text) VALUES (new.id * 2 + 1, new.name);
+        END;
+    """)
+    for table, column, offset in (("book", "title", 0), ("author", "name", 1)):
+        run_in_batches(cur, table, f"""
+            INSERT INTO name_trigrams (rowid, text)
+            SELECT id * 2 + {offset}, {column} FROM {table}
+            WHERE id > :lo AND id <= :hi
+              AND id * 2 + {offset} NOT IN (
+                  SELECT rowid FROM name_trigrams WHERE rowid > :lo * 2 AND rowid <= :hi * 2 + 1)
+        """)
+
+
+def add_search_keys(cur):
+    """Add indexed, normalized title_key and name_key columns for search.
+
+    The columns are filled by normalize_key() whenever this module writes a
+    title or name. Existing rows are backfilled in batches.
+    """
+    if has_fts(cur):
+        # Only reindex text when text changes, so this backfill and stock
+        # updates stop rewriting the full-text index
+        cur.execute("DROP TRIGGER IF EXISTS book_fts_update")
+        cur.execute("""
+            CREATE TRIGGER book_fts_update AFTER UPDATE OF id, title, author_id ON book BEGIN
+                DELETE FROM book_fts WHERE rowid = old.id;
+                INSERT INTO book_fts (rowid, title, author_name)
+                SELECT new.id, new.title, name FROM author WHERE id = new.author_id;
+            END
+        """)
+    for table, column, source in (("book", "title_key", "title"), ("author", "name_key", "name")):
+        columns = {row[1] for row in cur.execute(f"PRAGMA table_info({table})").fetchall()}
+        if column not in columns:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+        run_in_batches(cur, table, f"""
+            UPDATE {table} SET {column} = normalize_key({source})
+            WHERE id > :lo AND id <= :hi AND {column} IS NULL
+        """)
+        cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})")
+
+
+def drop_superseded_indexes(cur):
+    """Drop the NOCASE title and name indexes; search uses title_key and name_key now."""
+    cur.execute("DROP INDEX IF EXISTS idx_book_title")
+    cur.execute("DROP INDEX IF EXISTS idx_author_name")
+
+
+def setup_author_generation(cur):
+    """Create a counter that only author writes bump, for the author cache."""
+    add_counter(cur, "author_generation", [("author", event) for event in ("INSERT", "UPDATE", "DELETE")])
+
+
+def add_counter(cur, name, events):
+    """Create a one-row counter table that triggers bump on each (table, event) write."""
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+    """)
+    cur.execute(f"INSERT OR IGNORE INTO {name} VALUES (1, 0)")
+    for table, event in events:
+        trigger = f"{table}_{event.lower().replace(' ', '_')}_{name}"
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {trigger} AFTER {event} ON {table} BEGIN
+                UPDATE {name} SET generation = generation + 1 WHERE id = 1;
+            END
+        """)
+
+
+def setup_name_generation(cur):
+    """Create a counter that only title and name writes bump, for autocomplete."""
+    add_counter(cur, "name_generation", [
+        ("book", "INSERT"), ("book", "UPDATE OF title"), ("book", "DELETE"),
+        ("author", "INSERT"), ("author", "UPDATE OF name"), ("author", "DELETE"),
+    ])
+
+
+def current_generation(conn):
+    """Return the catalog generation, which changes whenever a book or author is written."""
+    return conn.execute("SELECT generation FROM catalog_generation WHERE id = 1").fetchone()[0]
+
+
+def setup_fts(cur):
+    """Create the full-text index over titles and author names if supported."""
+    try:
+        cur.execute("CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5(title, author_name)")
+    except sqlite3.OperationalError:
+        return  # SQLite built without FTS5; search falls back to LIKE
+    cur.executescript("""
+        CREATE TRIGGER IF NOT EXISTS book_fts_insert AFTER INSERT ON book BEGIN
+            INSERT INTO book_fts (rowid, title, author_name)
+            SELECT new.id, new.title, name FROM author WHERE id = new.author_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS book_fts_update AFTER UPDATE ON book BEGIN
+            DELETE FROM book_fts WHERE rowid = old.id;
+            INSERT INTO book_fts (rowid, title, author_name)
+            SELECT new.id, new.title, name FROM author WHERE id = new.author_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS book_fts_delete AFTER DELETE ON book BEGIN
+            DELETE FROM book_fts WHERE rowid = old.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS author_fts_update AFTER UPDATE OF name ON author BEGIN
+            UPDATE book_fts SET author_name = new.name
+            WHERE rowid IN (SELECT id FROM book WHERE author_id = new.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS author_fts_insert AFTER INSERT ON author BEGIN
+            INSERT INTO book_fts (rowid, title, author_name)
+            SELECT id, title, new.name FROM book WHERE author_id = new.id;
+        END;
+    """)
+    # Index books written before the index existed; the triggers cover the rest
+    run_in_batches(cur, "book", """
+        INSERT INTO book_fts (rowid, title, author_name)
+        SELECT book.id, book.title, author.name
+        FROM book
+        JOIN author ON book.author_id = author.id
+        WHERE book.id > :lo AND book.id <= :hi
+          AND book.id NOT IN (SELECT rowid FROM book_fts WHERE rowid > :lo AND rowid <= :hi)
+    """)
+
+
+def has_fts(cur):
+    """Return True if the full-text index exists in this database."""
+    cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'book_fts'")
+    return cur.fetchone() is not None
+
+
+def iter_rows(cur, batch_size=EXPORT_BATCH_SIZE):
+    """Yield rows from an executed cursor without loading them all at once."""
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def normalize_key(text):
+    """Fold text for search: NFKC, case-folded, punctuation removed, spaces collapsed."""
+    if text is None:
+        return None
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = "".join(ch for ch in text if not unicodedata.category(ch).startswith("P"))
+    return " ".join(text.split())
+
+
+def fts_query(keyword):
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    words = re.findall(r"\w+", keyword)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+# Schema changes in the order they are applied. PRAGMA user_version records how
+# many have run (schema_migrations keeps the history), so append new steps and
+# never reorder or remove old ones. Every step is idempotent, so databases made
+# before versioning, or interrupted mid-migration, replay safely.
+MIGRATIONS = (
+    create_tables,
+    create_indexes,
+    setup_id_sequence,
+    setup_fts,
+    setup_generation,
+    setup_trigrams,
+    add_search_keys,
+    setup_author_generation,
+    setup_name_generation,
+    drop_superseded_indexes,
+)
+
+
+# -----------------------------
+# Query instrumentation
+# -----------------------------
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that records time and row counts for every statement it runs.
+
+    The time is that of execute() itself, which for SQLite includes the first
+    step of the query; rows are counted as they are fetched.
+    """
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        self._stats_key = record_query(self, sql, parameters, time.perf_counter() - start)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._stats_key = record_query(self, sql, None, time.perf_counter() - start)
+        count_rows(self._stats_key, max(self.rowcount, 0))
+        return self
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        super().executescript(sql_script)
+        self._stats_key = record_query(self, sql_script, None, time.perf_counter() - start)
+        return self
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            count_rows(self._stats_key, 1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        count_rows(self._stats_key, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        count_rows(self._stats_key, len(rows))
+        return rows
+
+    def __next__(self):
+        row = super().__next__()
+        count_rows(self._stats_key, 1)
+        return row
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors, including execute() shortcuts, are TimedCursors.
+
+    It also holds the autocomplete changes made in its open transaction and
+    applies them only once that transaction commits.
+    """
+
+    def __init__(self, database, *args, **kwargs):
+        super().__init__(database, *args, **kwargs)
+        self.database = database
+        self.pending_completions = []
+        self.author_checked_at = float("-inf")  # forces a check on first use
+        self.data_version = None
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def commit(self):
+        super().commit()
+        self.flush_completions()
+
+    def rollback(self):
+        super().rollback()
+        self.pending_completions.clear()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # "with conn:" commits or rolls back in C, bypassing commit()/rollback()
+        try:
+            result = super().__exit__(exc_type, exc_value, traceback)
+        except BaseException:
+            self.pending_completions.clear()
+            raise
+        if exc_type is None:
+            self.flush_completions()
+        else:
+            self.pending_completions.clear()
+        return result
+
+    def flush_completions(self):
+        """Apply the autocomplete changes of a committed transaction."""
+        changes, self.pending_completions = self.pending_completions, []
+        if changes:
+            apply_completions(changes)
+
+
+def record_query(cur, sql, parameters, elapsed):
+    """Add one execution to QUERY_STATS, logging it if slow; return its key."""
+    key = " ".join(sql.split())
+    with _stats_lock:
+        stats = QUERY_STATS.setdefault(key, [0, 0.0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] = max(stats[2], elapsed)
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        log_slow_query(cur, key, parameters, elapsed)
+    return key
+
+
+def count_rows(key, rows):
+    """Add fetched rows to a statement's total."""
+    with _stats_lock:
+        QUERY_STATS[key][3] += rows
+
+
+def log_slow_query(cur, sql, parameters, elapsed):
+    """Append a slow statement and its query plan to SLOW_QUERY_LOG."""
+    plan = []
+    if parameters is not None:
+        try:
+            # A plain cursor, so the EXPLAIN itself is not timed or logged
+            explain = sqlite3.Cursor(cur.connection)
+            explain.execute("EXPLAIN QUERY PLAN " + sql, parameters)
+            plan = [row[-1] for row in explain.fetchall()]
+        except sqlite3.Error:
+            pass
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    with open(SLOW_QUERY_LOG, "a", encoding="utf-8") as f:
+        f.write(f"{stamp} {elapsed * 1000:.1f} ms: {sql}\n")
+        if parameters:
+            f.write(f"    params: {parameters!r}\n")
+        for step in plan:
+            f.write(f"    plan: {step}\n")
+
+
+def print_query_stats():
+    """Print per-statement totals, slowest first."""
+    with _stats_lock:
+        rows = sorted(QUERY_STATS.items(), key=lambda item: item[1][1], reverse=True)
+    if not rows:
+        print("No queries recorded.")
+        return
+    print(f"\n{'count':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9} {'rows':>9}  statement")
+    for sql, (count, total, longest, fetched) in rows:
+        print(f"{count:>7} {total * 1000:>10.2f} {total * 1000 / count:>9.3f} "
+              f"{longest * 1000:>9.3f} {fetched:>9}  {sql[:70]}")
+
+
+if os.environ.get("SHELF_TRACK_QUERY_STATS"):
+    atexit.register(print_query_stats)
+
+
+# -----------------------------
+# Caches
+# -----------------------------
+def get_author(author_id, conn=None):
+    """Return (name, country) for an author, or None if there is no such author.
+
+    Found authors are cached; misses are not, so a newly added author is seen
+    at once. Nothing read inside an open transaction is cached, since that
+    transaction may still roll back. A hit runs no SQL at all.
+    """
+    conn = conn or connect_db()
+    if time.monotonic() - conn.author_checked_at > AUTHOR_CACHE_RECHECK:
+        check_author_cache(conn)
+    with _author_cache_lock:
+        author = _author_cache.get(author_id)
+        if author is not None:
+            _author_cache.move_to_end(author_id)
+            AUTHOR_CACHE_STATS["hits"] += 1
+            return author
+        AUTHOR_CACHE_STATS["misses"] += 1
+    author = conn.execute("SELECT name, country FROM author WHERE id = ?", (author_id,)).fetchone()
+    if author is not None and not conn.in_transaction:
+        with _author_cache_lock:
+            _author_cache[author_id] = author
+            if len(_author_cache) > AUTHOR_CACHE_SIZE:
+                _author_cache.popitem(last=False)
+    return author
+
+
+def check_author_cache(conn):
+    """Empty the author cache if another connection has written an author."""
+    conn.author_checked_at = time.monotonic()
+    version = conn.execute("PRAGMA data_version").fetchone()[0]
+    if version == conn.data_version:
+        return  # nobody else has committed since the last check
+    conn.data_version = version
+    generation = conn.execute("SELECT generation FROM author_generation WHERE id = 1").fetchone()[0]
+    generation = (conn.database, generation)  # a different file starts a new cache
+    with _author_cache_lock:
+        if generation != _author_cache_generation["value"]:
+            _author_cache.clear()
+            _author_cache_generation["value"] = generation
+
+
+def invalidate_author(author_id):
+    """Drop an author from the cache after it has been written."""
+    with _author_cache_lock:
+        _author_cache.pop(author_id, None)
+
+
+def cached_search(keyword, conn=None):
+    """Return an iterable of search results, served from the cache when fresh."""
+    conn = conn or connect_db()
+    key = " ".join(keyword.casefold().split())
+    generation = current_generation(conn)
+    with _search_cache_lock:
+        entry = _search_cache.get(key)
+        if entry and entry[0] == generation and entry[1] > time.monotonic():
+            _search_cache.move_to_end(key)
+            SEARCH_CACHE_STATS["hits"] += 1
+            return entry[2]
+        SEARCH_CACHE_STATS["misses"] += 1
+
+    cur = search_catalog(conn.cursor(), keyword)
+    rows = cur.fetchmany(SEARCH_CACHE_MAX_ROWS + 1)
+    if len(rows) > SEARCH_CACHE_MAX_ROWS:
+        return itertools.chain(rows, iter_rows(cur))
+    if not conn.in_transaction:
+        with _search_cache_lock:
+            _search_cache[key] = (generation, time.monotonic() + SEARCH_CACHE_TTL, rows)
+            _search_cache.move_to_end(key)
+            if len(_search_cache) > SEARCH_CACHE_SIZE:
+                _search_cache.popitem(last=False)
+    return rows
+
+
+def print_cache_stats():
+    """Print hit and miss counts for the caches."""
+    for name, cache, size, stats in (
+            ("Author cache", _author_cache, AUTHOR_CACHE_SIZE, AUTHOR_CACHE_STATS),
+            ("Search cache", _search_cache, SEARCH_CACHE_SIZE, SEARCH_CACHE_STATS)):
+        hits, misses = stats["hits"], stats["misses"]
+        rate = hits / (hits + misses) if hits + misses else 0
+        print(f"{name}: {len(cache)}/{size} entries, {hits} hits, {misses} misses ({rate:.0%} hit rate)")
+
+
+# -----------------------------
+# Autocomplete
+# -----------------------------
+def build_completions(conn):
+    """Load every title and author name into a new sorted list, then swap it in.
+
+    Lookups and commits keep using the old list while this runs; changes
+    committed meanwhile are replayed onto the new one before the swap.
+    """
+    replay = []
+    with _completions_lock:
+        _completions["replay"] = replay
+    try:
+        generation = conn.execute("SELECT generation FROM name_generation WHERE id = 1").fetchone()[0]
+        text = {}
+        for kind, sql in (("book", "SELECT id, title FROM book"), ("author", "SELECT id, name FROM author")):
+            for ref_id, display in iter_rows(conn.execute(sql)):
+                text[(kind, ref_id)] = (normalize_key(display), display)
+        keys = sorted((key, kind, ref_id) for (kind, ref_id), (key, _) in text.items())
+    except BaseException:
+        with _completions_lock:
+            if _completions["replay"] is replay:
+                _completions["replay"] = None
+        raise
+    with _completions_lock:
+        if _completions["replay"] is not replay:
+            return  # reset_completions() ran meanwhile; this load may predate it
+        for change in replay:
+            change_completion(keys, text, *change)
+        _completions.update(keys=keys, text=text, built=time.monotonic(),
+                            generation=generation, replay=None)
+
+
+def refresh_completions(conn):
+    """Rebuild the list if a title or name has been written since it was built."""
+    generation = conn.execute("SELECT generation FROM name_generation WHERE id = 1").fetchone()[0]
+    if generation != _completions["generation"]:
+        build_completions(conn)
+    else:
+        with _completions_lock:
+            _completions["built"] = time.monotonic()
+
+
+def autocomplete(prefix, limit=AUTOCOMPLETE_LIMIT, conn=None):
+    """Return up to limit (kind, ID, text) matches for titles and names starting with prefix."""
+    conn = conn or connect_db()
+    key = normalize_key(prefix)
+    built = _completions["built"]
+    if built is None:
+        with _rebuild_lock:  # the first build has to finish before anything can match
+            if _completions["built"] is None:
+                build_completions(conn)
+    elif time.monotonic() - built > AUTOCOMPLETE_REFRESH and _rebuild_lock.acquire(blocking=False):
+        try:
+            refresh_completions(conn)
+        finally:
+            _rebuild_lock.release()
+    with _completions_lock:
+        keys, text = _completions["keys"], _completions["text"]
+        matches = []
+        i = bisect.bisect_left(keys, (key,))
+        while i < len(keys) and keys[i][0].startswith(key) and len(matches) < limit:
+            _, kind, ref_id = keys[i]
+            matches.append((kind, ref_id, text[(kind, ref_id)][1]))
+            i += 1
+    return matches
+
+
+def put_completion(conn, kind, ref_id, display):
+    """Add or rename a title or author name once conn's transaction commits."""
+    queue_completion(conn, (kind, ref_id, display))
+
+
+def drop_completion(conn, kind, ref_id):
+    """Remove a title or author name once conn's transaction commits."""
+    queue_completion(conn, (kind, ref_id, None))
+
+
+def queue_completion(conn, change):
+    """Hold a (kind, ID, display or None) change until commit; a rollback discards it."""
+    if conn.in_transaction:
+        conn.pending_completions.append(change)
+    else:
+        apply_completions([change])
+
+
+def apply_completions(changes):
+    """Apply (kind, ID, display or None to remove) changes to the autocomplete list."""
+    with _completions_lock:
+        if _completions["replay"] is not None:
+            _completions["replay"].extend(changes)
+        if _completions["built"] is None:
+            return  # built from the database on first use
+        for change in changes:
+            change_completion(_completions["keys"], _completions["text"], *change)
+
+
+def change_completion(keys, text, kind, ref_id, display):
+    """Replace or remove (display None) one entry in a keys list and text map."""
+    old = text.pop((kind, ref_id), None)
+    if old is not None:
+        i = bisect.bisect_left(keys, (old[0], kind, ref_id))
+        if i < len(keys) and keys[i] == (old[0], kind, ref_id):
+            del keys[i]
+    if display is not None:
+        key = normalize_key(display)
+        bisect.insort(keys, (key, kind, ref_id))
+        text[(kind, ref_id)] = (key, display)
+
+
+def reset_completions():
+    """Forget the autocomplete list so it is rebuilt on next use (after bulk loads)."""
+    with _completions_lock:
+        _completions["built"] = None
+        _completions["replay"] = None  # any rebuild under way discards its load
+
+
+# -----------------------------
+# Fuzzy search
+# -----------------------------
+def edit_distance(a, b, limit):
+    """Return the edit distance (with transpositions) between a and b, or limit + 1 if above limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def fuzzy_search(text, limit=FUZZY_LIMIT, conn=None):
+    """Return up to limit (kind, ID, text, distance) near matches for text.
+
+    Candidates come from the trigram index ranked by shared trigrams, so only
+    FUZZY_CANDIDATES rows are compared in Python. A match needs every query
+    word within 1 edit of some word in it (2 edits for words of 6+ letters).
+    """
+    conn = conn or connect_db()
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'name_trigrams'").fetchone():
+        raise ValueError("Fuzzy search needs SQLite 3.34 or newer.")
+    words = [word for word in re.findall(r"\w+", text.casefold()) if len(word) >= 3]
+    grams = {word[i:i + 3] for word in words for i in range(len(word) - 2)}
+    if not grams:
+        return []
+    match = " OR ".join('"' + gram.replace('"', '""') + '"' for gram in sorted(grams))
+    cur = conn.execute(
+        "SELECT rowid, text FROM name_trigrams WHERE name_trigrams MATCH ? ORDER BY rank LIMIT ?",
+        (match, FUZZY_CANDIDATES)
+    )
+    scored = []
+    for rank, (rowid, candidate) in enumerate(cur.fetchall()):
+        candidate_words = re.findall(r"\w+", candidate.casefold())
+        total = 0
+        for word in words:
+            allowed = 2 if len(word) >= 6 else 1
+            best = min((edit_distance(word, other, allowed) for other in candidate_words),
+                       default=allowed + 1)
+            if best > allowed:
+                break
+            total += best
+        else:
+            kind = "author" if rowid % 2 else "book"
+            scored.append((total, rank, kind, rowid // 2, candidate))
+    scored.sort()
+    return [(kind, ref_id, candidate, total) for total, _, kind, ref_id, candidate in scored[:limit]]
+
+
+# -----------------------------
+# Input validation
+# -----------------------------
+def check_id(input_str):
+    """Validate input as an integer ID of 4 to 12 digits."""
+    if input_str.isdigit() and ID_MIN_DIGITS <= len(input_str) <= ID_MAX_DIGITS:
+        return int(input_str)
+    raise ValueError(f"ID must be a number of {ID_MIN_DIGITS} to {ID_MAX_DIGITS} digits.")
+
+
+def check_optional_id(input_str):
+    """Validate an ID, or return None when left blank for auto-assignment."""
+    input_str = input_str.strip()
+    return check_id(input_str) if input_str else None
+
+
+def check_quantity(input_str):
+    """Validate input as a non-negative integer."""
+    if input_str.isdigit() and int(input_str) >= 0:
+        return int(input_str)
+    raise ValueError("Quantity must be a non-negative number.")
+
+
+def get_non_empty_input(input_str, field_name):
+    """Ensure input is not empty."""
+    if input_str.strip() == "":
+        raise ValueError(f"{field_name} cannot be empty.")
+    return input_str.strip()
+
+
+# -----------------------------
+# Data operations
+# -----------------------------
+# These take a connection and leave committing to the caller, so several can
+# share one transaction.
+def insert_author(conn, author_id, name, country):
+    """Insert an author, auto-assigning the ID if None, and return the ID."""
+    if author_id is None:
+        author_id = reserve_ids("author")
+    try:
+        conn.execute(INSERT_SQL["author"], (author_id, name, country))
+    except sqlite3.IntegrityError:
+        raise ValueError("Author ID already exists.") from None
+    invalidate_author(author_id)
+    put_completion(conn, "author", author_id, name)
+    return author_id
+
+
+def insert_book(conn, book_id, title, author_id, qty):
+    """Insert a book for an existing author and return its ID."""
+    if get_author(author_id, conn) is None:
+        raise ValueError("Author ID not found. Add author first.")
+    if book_id is None:
+        book_id = reserve_ids("book")
+    try:
+        conn.execute(INSERT_SQL["book"], (book_id, title, author_id, qty))
+    except sqlite3.IntegrityError:
+        raise ValueError("Book ID already exists.") from None
+    put_completion(conn, "book", book_id, title)
+    return book_id
+
+
+def update_row(conn, table, row_id, changes, expect):
+    """UPDATE the changed columns of one row, only if the expected values still hold."""
+    if not set(expect or {}) <= set(EDITABLE_COLUMNS[table]):
+        raise ValueError(f"Can only compare {', '.join(EDITABLE_COLUMNS[table])}.")
+    expect = expect or {}
+    assignments = ", ".join(f"{column} = ?" for column in changes)
+    unchanged = "".join(f" AND {column} = ?" for column in expect)
+    cur = conn.execute(f"UPDATE {table} SET {assignments} WHERE id = ?{unchanged}",
+                       (*changes.values(), row_id, *expect.values()))
+    if cur.rowcount == 0:
+        if expect and conn.execute(f"SELECT 1 FROM {table} WHERE id = ?", (row_id,)).fetchone():
+            raise ValueError("This record was changed by another terminal. Reload it and try again.")
+        raise ValueError(f"No {table} found.")
+
+
+def edit_book(conn, book_id, title=None, author_id=None, qty=None, expect=None):
+    """Overwrite the given fields of a book.
+
+    expect maps columns to the values last read; if any has changed since,
+    nothing is written and ValueError is raised.
+    """
+    changes = {"title": title, "author_id": author_id, "qty": qty}
+    changes = {column: value for column, value in changes.items() if value is not None}
+    if not changes:
+        raise ValueError("Nothing to update.")
+    if title is not None:
+        changes["title_key"] = normalize_key(title)
+    if author_id is not None and get_author(author_id, conn) is None:
+        raise ValueError("Author ID not found. Add author first.")
+    update_row(conn, "book", book_id, changes, expect)
+    if title is not None:
+        put_completion(conn, "book", book_id, title)
+
+
+def edit_author(conn, author_id, name=None, country=None, expect=None):
+    """Overwrite the given fields of an author; expect works as for edit_book."""
+    changes = {"name": name, "country": country}
+    changes = {column: value for column, value in changes.items() if value is not None}
+    if not changes:
+        raise ValueError("Nothing to update.")
+    if name is not None:
+        changes["name_key"] = normalize_key(name)
+    try:
+        update_row(conn, "author", author_id, changes, expect)
+    finally:
+        invalidate_author(author_id)  # also drops a stale copy when expect fails
+    if name is not None:
+        put_completion(conn, "author", author_id, name)
+
+
+def remove_book(conn, book_id):
+    """Delete a book by ID."""
+    if conn.execute("DELETE FROM book WHERE id = ?", (book_id,)).rowcount == 0:
+        raise ValueError("No book found.")
+    drop_completion(conn, "book", book_id)
+
+
+def fetch_book(conn, book_id):
+    """Return (id, title, author name, author country, qty) for a book, or None."""
+    return conn.execute(f"""
+        SELECT {BOOK_COLUMNS} FROM book
+        JOIN author ON book.author_id = author.id
+        WHERE book.id = ?
+    """, (book_id,)).fetchone()
+
+
+def classify_keyword(keyword):
+    """Return how a search keyword should be answered: "id", "id_prefix" or "text".
+
+    A number as long as an ID is looked up as one; shorter numbers are ID
+    prefixes; anything else is free text. IDs are stored as integers and never
+    start with 0, so digits with a leading zero (e.g. "007") are text too.
+    """
+    if re.fullmatch(r"[1-9][0-9]*", keyword) and len(keyword) <= ID_MAX_DIGITS:
+        return "id" if len(keyword) >= ID_MIN_DIGITS else "id_prefix"
+    return "text"
+
+
+def id_prefix_ranges(prefix):
+    """Return the (lo, hi) ID ranges whose IDs start with the digits in prefix.
+
+    There is one range per ID length, so for a prefix without a leading zero
+    the ranges never overlap and no ID is returned twice.
+    """
+    ranges = []
+    for digits in range(max(len(prefix), ID_MIN_DIGITS), ID_MAX_DIGITS + 1):
+        span = 10 ** (digits - len(prefix))
+        ranges.append((int(prefix) * span, int(prefix) * span + span - 1))
+    return ranges
+
+
+def search_catalog(cur, keyword):
+    """Run the book search for keyword on cur and return it for iteration.
+
+    The keyword is classified first: an ID is a primary-key lookup, an ID
+    prefix becomes primary-key range scans, and text uses the search indexes.
+    Numbers that match no ID are searched as text (e.g. the title "1984").
+    Rows are (id, title, author name, author country, qty).
+    """
+    kind = classify_keyword(keyword)
+    if kind == "id" and cur.execute("SELECT 1 FROM book WHERE id = ?", (int(keyword),)).fetchone():
+        return cur.execute(f"""
+            SELECT {BOOK_COLUMNS} FROM book
+            JOIN author ON book.author_id = author.id
+            WHERE book.id = ?
+        """, (int(keyword),))
+    if kind in ("id", "id_prefix"):
+        ranges = id_prefix_ranges(keyword)
+        in_ranges = " UNION ALL ".join("SELECT id FROM book WHERE id BETWEEN ? AND ?" for _ in ranges)
+        params = [bound for pair in ranges for bound in pair]
+        if cur.execute(f"SELECT 1 FROM ({in_ranges}) LIMIT 1", params).fetchone():
+            return cur.execute(f"""
+                SELECT {BOOK_COLUMNS} FROM ({in_ranges}) AS hits
+                JOIN book ON book.id = hits.id
+                JOIN author ON book.author_id = author.id
+                ORDER BY book.id
+            """, params)
+
+    key = normalize_key(keyword)
+    if not key:
+        # Only an empty keyword lists everything; one of just punctuation or
+        # symbols normalizes to nothing and matches nothing
+        return cur.execute(f"""
+            SELECT {BOOK_COLUMNS} FROM book
+            JOIN author ON book.author_id = author.id
+            WHERE ?
+            ORDER BY book.id
+        """, (not keyword.strip(),))
+    # Titles and names starting with the keyword come first, via the key
+    # indexes; then word matches from the full-text index ranked by bm25, or
+    # a substring scan of the keys without FTS5.
+    if has_fts(cur):
+        word_hits = "SELECT rowid, 1, bm25(book_fts) FROM book_fts WHERE book_fts MATCH :match"
+    else:
+        word_hits = """
+            SELECT book.id, 1, 0 FROM book
+            JOIN author ON book.author_id = author.id
+            WHERE book.title_key LIKE :contains OR author.name_key LIKE :contains
+        """
+    return cur.execute(f"""
+        WITH hits (id, tier, rank) AS (
+            SELECT id, 0, 0 FROM book
+            WHERE title_key >= :key AND title_key < :key || char(1114111)
+            UNION ALL
+            SELECT book.id, 0, 0 FROM author
+            JOIN book ON book.author_id = author.id
+            WHERE author.name_key >= :key AND author.name_key < :key || char(1114111)
+            UNION ALL
+            {word_hits}
+        )
+        SELECT {BOOK_COLUMNS}
+        FROM (SELECT id, MIN(tier) AS tier, MIN(rank) AS rank FROM hits GROUP BY id) AS best
+        JOIN book ON book.id = best.id
+        JOIN author ON book.author_id = author.id
+        ORDER BY best.tier, best.rank, book.id
+    """, {"key": key, "match": fts_query(keyword) or '""', "contains": f"%{key}%"})
+
+
+def fetch_page(table, anchor, page_size=PAGE_SIZE, before=False):
+    """Return the page of rows whose IDs follow anchor, or precede it if before.
+
+    Pages are found by key (id > anchor) rather than OFFSET, so every page costs
+    the same however far into the catalog it is.
+    """
+    op, order = ("<", "DESC") if before else (">", "ASC")
+    if table == "book":
+        sql = f"""
+            SELECT book.id, book.title, author.name, author.country
+            FROM book
+            JOIN author ON book.author_id = author.id
+            WHERE book.id {op} ?
+            ORDER BY book.id {order}
+            LIMIT ?
+        """
+    else:
+        sql = f"SELECT id, name, country FROM author WHERE id {op} ? ORDER BY id {order} LIMIT ?"
+    cur = connect_db().execute(sql, (anchor, page_size))
+    rows = cur.fetchall()
+    return rows[::-1] if before else rows
+
+
+# -----------------------------
+# Sales and restocking
+# -----------------------------
+def sell_items(basket):
+    """Take each (book ID, quantity) in basket off the shelf in one transaction.
+
+    Each decrement is relative (qty = qty - n) and guarded by qty >= n, so
+    concurrent sales never lose updates or oversell. If any line fails, the
+    whole basket is rolled back and ValueError is raised.
+    """
+    with connect_db() as conn:
+        for book_id, qty in basket:
+            if qty <= 0:
+                raise ValueError("Quantity must be a positive number.")
+            cur = conn.execute(
+                "UPDATE book SET qty = qty - ? WHERE id = ? AND qty >= ?",
+                (qty, book_id, qty)
+            )
+            if cur.rowcount == 0:
+                found = conn.execute("SELECT 1 FROM book WHERE id = ?", (book_id,)).fetchone()
+                raise ValueError(f"Not enough stock for book {book_id}." if found
+                                 else f"No book found with ID {book_id}.")
+
+
+def restock_items(basket):
+    """Add each (book ID, quantity) in basket to stock in one transaction."""
+    with connect_db() as conn:
+        for book_id, qty in basket:
+            if qty <= 0:
+                raise ValueError("Quantity must be a positive number.")
+            cur = conn.execute("UPDATE book SET qty = qty + ? WHERE id = ?", (qty, book_id))
+            if cur.rowcount == 0:
+                raise ValueError(f"No book found with ID {book_id}.")
+
+
+# -----------------------------
+# Bulk import
+# -----------------------------
+def read_records(path):
+    """Yield (line number, record) pairs from a CSV or JSONL file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except ValueError:
+                    yield line_no, None
+        else:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+
+
+def chunked(items, size):
+    """Yield lists of up to size items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def validate_record(table, record):
+    """Return the row tuple for a record (ID None if blank), or raise ValueError."""
+    if not isinstance(record, dict):
+        raise ValueError("Malformed record.")
+    field = {key: "" if value is None else str(value) for key, value in record.items()}
+    if table == "author":
+        return (
+            check_optional_id(field.get("id", "")),
+            get_non_empty_input(field.get("name", ""), "Name"),
+            get_non_empty_input(field.get("country", ""), "Country"),
+        )
+    author_id = check_id(field.get("author_id", ""))
+    if get_author(author_id) is None:
+        raise ValueError("Author ID not found.")
+    return (
+        check_optional_id(field.get("id", "")),
+        get_non_empty_input(field.get("title", ""), "Title"),
+        author_id,
+        check_quantity(field.get("qty", "")),
+    )
+
+
+def assign_ids(table, rows):
+    """Fill in blank IDs from one reserved block for the whole batch."""
+    blanks = sum(1 for _, _, row in rows if row[0] is None)
+    if not blanks:
+        return rows
+    next_id = reserve_ids(table, blanks)
+    assigned = []
+    for line_no, record, row in rows:
+        if row[0] is None:
+            row = (next_id, *row[1:])
+            next_id += 1
+        assigned.append((line_no, record, row))
+    return assigned
+
+
+def insert_batch(conn, table, rows):
+    """Insert (line number, record, row) triples in one transaction; return the rejects."""
+    sql = INSERT_SQL[table]
+    try:
+        with conn:
+            conn.executemany(sql, [row for _, _, row in rows])
+        return []
+    except sqlite3.IntegrityError:
+        pass
+    # Some row clashed: retry one by one so only the duplicates are rejected
+    rejected = []
+    with conn:
+        for line_no, record, row in rows:
+            try:
+                conn.execute(sql, row)
+            except sqlite3.IntegrityError:
+                rejected.append((line_no, record, "ID already exists."))
+    return rejected
+
+
+def import_file(path, table, batch_size=IMPORT_BATCH_SIZE):
+    """Stream a CSV or JSONL file into the book or author table and return stats.
+
+    Rejected rows go to <path>.rejects. Progress is saved to <path>.checkpoint
+    after every batch, so an interrupted import resumes where it stopped.
+    """
+    if table not in INSERT_SQL:
+        raise ValueError(f"Table must be one of: {', '.join(INSERT_SQL)}.")
+    checkpoint_path = path + ".checkpoint"
+    resume_after = 0
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, encoding="utf-8") as f:
+            resume_after = int(f.read().strip() or 0)
+
+    conn = connect_db()
+
+    records = ((n, r) for n, r in read_records(path) if n > resume_after)
+    imported = rejected = 0
+    start = time.perf_counter()
+    with open(path + ".rejects", "a" if resume_after else "w", encoding="utf-8") as rejects:
+        for batch in chunked(records, batch_size):
+            rows, failures = [], []
+            for line_no, record in batch:
+                try:
+                    rows.append((line_no, record, validate_record(table, record)))
+                except ValueError as ve:
+                    failures.append((line_no, record, str(ve)))
+            rows = assign_ids(table, rows)
+            duplicates = insert_batch(conn, table, rows)
+            failures.extend(duplicates)
+            for line_no, record, error in failures:
+                rejects.write(json.dumps({"line": line_no, "error": error, "record": record}) + "\n")
+            rejects.flush()
+            imported += len(rows) - len(duplicates)
+            rejected += len(failures)
+            with open(checkpoint_path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(str(batch[-1][0]))
+            os.replace(checkpoint_path + ".tmp", checkpoint_path)
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    reset_completions()
+    elapsed = time.perf_counter() - start
+    return {
+        "imported": imported,
+        "rejected": rejected,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(imported / elapsed) if elapsed else 0,
+    }
+
+
+# -----------------------------
+# Streaming export
+# -----------------------------
+def format_text_row(values):
+    """Lay out one row in fixed-width columns, truncating long values."""
+    return "".join(str(v)[:w - 1].ljust(w) for v, w in zip(values, TEXT_WIDTHS)).rstrip() + "\n"
+
+
+def export_catalog(path, batch_size=EXPORT_BATCH_SIZE):
+    """Stream every book with its author to a .csv, .jsonl or .txt file; return the count."""
+    fmt = os.path.splitext(path)[1].lstrip(".")
+    if fmt not in ("csv", "jsonl", "txt"):
+        raise ValueError("Export file must end in .csv, .jsonl or .txt.")
+
+    cur = connect_db().cursor()
+    cur.execute("""
+        SELECT book.id, book.title, author.name, author.country, book.qty
+        FROM book
+        JOIN author ON book.author_id = author.id
+        ORDER BY book.id
+    """)
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_COLUMNS)
+        elif fmt == "txt":
+            f.write(format_text_row(EXPORT_COLUMNS))
+        for row in iter_rows(cur, batch_size):
+            if fmt == "csv":
+                writer.writerow(row)
+            elif fmt == "jsonl":
+                f.write(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n")
+            else:
+                f.write(format_text_row(row))
+            count += 1
+    cur.close()
+    return count
+
+
+# -----------------------------
+# Service API
+# -----------------------------
+# Each call runs in its own transaction on this thread's connection and takes
+# and returns plain values, so the menu, CLI, server and benchmarks share it.
+# Batches are all-or-nothing: if one item fails, none of them are saved.
+def add_authors(rows):
+    """Add (author ID or None, name, country) rows and return their IDs."""
+    with connect_db() as conn:
+        return [insert_author(conn, *row) for row in rows]
+
+
+def add_author(name, country, author_id=None):
+    """Add an author and return its ID (auto-assigned if author_id is None)."""
+    return add_authors([(author_id, name, country)])[0]
+
+
+def add_books(rows):
+    """Add (book ID or None, title, author ID, qty) rows and return their IDs."""
+    with connect_db() as conn:
+        return [insert_book(conn, *row) for row in rows]
+
+
+def add_book(title, author_id, qty, book_id=None):
+    """Add a book for an existing author and return its ID."""
+    return add_books([(book_id, title, author_id, qty)])[0]
+
+
+def update_books(changes):
+    """Apply (book ID, {field: value}) changes, using edit_book's fields."""
+    with connect_db() as conn:
+        for book_id, fields in changes:
+            edit_book(conn, book_id, **fields)
+
+
+def update_book(book_id, **fields):
+    """Change a book's title, author_id and/or qty."""
+    update_books([(book_id, fields)])
+
+
+def update_authors(changes):
+    """Apply (author ID, {field: value}) changes, using edit_author's fields."""
+    with connect_db() as conn:
+        for author_id, fields in changes:
+            edit_author(conn, author_id, **fields)
+
+
+def update_author(author_id, **fields):
+    """Change an author's name and/or country."""
+    update_authors([(author_id, fields)])
+
+
+def delete_books(book_ids):
+    """Delete books by ID."""
+    with connect_db() as conn:
+        for book_id in book_ids:
+            remove_book(conn, book_id)
+
+
+def delete_book(book_id):
+    """Delete a book by ID."""
+    delete_books([book_id])
+
+
+def get_books(book_ids):
+    """Return {book ID: (id, title, author, country, qty)} for the IDs that exist."""
+    cur = connect_db().execute(f"""
+        SELECT {BOOK_COLUMNS} FROM book
+        JOIN author ON book.author_id = author.id
+        WHERE book.id IN (SELECT value FROM json_each(?))
+    """, (json.dumps(list(book_ids)),))
+    return {row[0]: row for row in cur.fetchall()}
+
+
+def get_book(book_id):
+    """Return (id, title, author, country, qty) for a book, or None."""
+    return fetch_book(connect_db(), book_id)
+
+
+def get_book_record(book_id):
+    """Return a book's own (title, author ID, qty) for editing, or None."""
+    return connect_db().execute("SELECT title, author_id, qty FROM book WHERE id = ?",
+                                (book_id,)).fetchone()
+
+
+def search(query, limit=None):
+    """Return up to limit (all if None) books matching query, best first."""
+    rows = cached_search(query.strip())
+    return list(rows if limit is None else itertools.islice(rows, limit))
+
+
+def search_many(queries, limit=None):
+    """Run several searches and return their result lists in the same order."""
+    return [search(query, limit) for query in queries]
+
+
+def run_operation(conn, op):
+    """Run one operation described by a dict with an "op" key; return its result."""
+    field = {key: "" if value is None else str(value) for key, value in op.items()}
+    name = field.get("op", "")
+    if name == "add-author":
+        author_id = insert_author(
+            conn,
+            check_optional_id(field.get("id", "")),
+            get_non_empty_input(field.get("name", ""), "Name"),
+            get_non_empty_input(field.get("country", ""), "Country"),
+        )
+        return {"id": author_id}
+    if name == "add-book":
+        book_id = insert_book(
+            conn,
+            check_optional_id(field.get("id", "")),
+            get_non_empty_input(field.get("title", ""), "Title"),
+            check_id(field.get("author_id", "")),
+            check_quantity(field.get("qty", "")),
+        )
+        return {"id": book_id}
+    if name == "update":
+        book_id = check_id(field.get("id", ""))
+        edit_book(
+            conn,
+            book_id,
+            title=get_non_empty_input(field["title"], "Title") if field.get("title") else None,
+            author_id=check_id(field["author_id"]) if field.get("author_id") else None,
+            qty=check_quantity(field["qty"]) if field.get("qty") else None,
+        )
+        return {"id": book_id}
+    if name == "delete":
+        book_id = check_id(field.get("id", ""))
+        remove_book(conn, book_id)
+        return {"id": book_id}
+    if name == "search":
+        rows = cached_search(field.get("keyword", "").strip(), conn)
+        return {"results": [dict(zip(EXPORT_COLUMNS, row)) for row in rows]}
+    raise ValueError(f"Unknown operation '{name}'.")
@@ -0,0 +1,122 @@
+"""
+eBookstore API load test
+Drives a running shelf_server with keep-alive clients and reports throughput and latency.
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import quote
+
+from shelf_bench import percentiles
+
+# Share of requests per endpoint, as (name, weight)
+REQUEST_MIX = (("get_book", 60), ("search", 30), ("sell", 10))
+SEARCH_WORDS = ("tale", "stone", "river", "garden", "winter", "café", "smith", "müller")
+SAMPLE_BOOKS = 1000
+
+
+def call(conn, method, path, body=None):
+    """Send one request on a persistent connection and return (status, payload)."""
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    headers = {"Content-Type": "application/json"} if data else {}
+    conn.request(method, path, body=data, headers=headers)
+    response = conn.getresponse()
+    return response.status, json.loads(response.read() or b"{}")
+
+
+def sample_book_ids(host, port, count):
+    """Page through /books to collect up to count book IDs to request."""
+    conn = http.client.HTTPConnection(host, port)
+    ids, after = [], 0
+    while len(ids) < count:
+        _, payload = call(conn, "GET", f"/books?after={after}&limit=1000")
+        if not payload.get("books"):
+            break
+        ids.extend(book["id"] for book in payload["books"])
+        after = ids[-1]
+    conn.close()
+    return ids[:count]
+
+
+def client(host, port, book_ids, deadline, seed, results, index):
+    """Issue a random request mix until the deadline, recording each latency."""
+    rng = random.Random(seed)
+    names, weights = zip(*REQUEST_MIX)
+    conn = http.client.HTTPConnection(host, port)
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        if name == "get_book":
+            request = ("GET", f"/books/{rng.choice(book_ids)}", None)
+        elif name == "search":
+            request = ("GET", f"/search?q={quote(rng.choice(SEARCH_WORDS))}&limit=20", None)
+        else:
+            request = ("POST", "/sell", {"items": [{"id": rng.choice(book_ids), "qty": 1}]})
+        start = time.perf_counter()
+        try:
+            status, _ = call(conn, *request)
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(host, port)
+            status = None
+        elapsed = time.perf_counter() - start
+        results.append((index, name, status, elapsed))
+    conn.close()
+
+
+def main(argv=None):
+    """Run the load test and print requests/sec with latency percentiles."""
+    parser = argparse.ArgumentParser(description="Load test a running shelf_server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--clients", type=int, default=16, help="concurrent keep-alive connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    book_ids = sample_book_ids(args.host, args.port, SAMPLE_BOOKS)
+    if not book_ids:
+        print("The server has no books to request.")
+        return 1
+    # Top up stock first so sales measure the write path rather than running out
+    setup = http.client.HTTPConnection(args.host, args.port)
+    call(setup, "POST", "/restock", {"items": [{"id": b, "qty": 1000} for b in book_ids]})
+    setup.close()
+
+    results = []  # list.append is atomic, so clients can share it
+    deadline = time.perf_counter() + args.duration
+    threads = [threading.Thread(target=client, args=(args.host, args.port, book_ids,
+                                                     deadline, args.seed + n, results, n))
+               for n in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    errors = sum(1 for _, _, status, _ in results if status is None or status >= 500)
+    print(f"{len(results)} requests in {elapsed:.1f}s from {args.clients} clients: "
+          f"{len(results) / elapsed:.0f} requests/sec, {errors} errors")
+    # A client starved by the server shows up as a count far below the others
+    per_client = [0] * args.clients
+    for index, *_ in results:
+        per_client[index] += 1
+    print(f"requests per client: min {min(per_client)}, max {max(per_client)}, "
+          f"mean {len(results) / args.clients:.0f}")
+    print(f"{'endpoint':<12}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name in ["all"] + [name for name, _ in REQUEST_MIX]:
+        samples = [t for _, n, _, t in results if name in ("all", n)]
+        if len(samples) < 2:
+            continue
+        stats = percentiles(samples)
+        print(f"{name:<12}{stats['count']:>8}{stats['p50_ms']:>10.3f}"
+              f"{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,376 @@
+"""
+eBookstore HTTP API
+Serves books, authors, search and stock operations as JSON over HTTP.
+"""
+
+import argparse
+import json
+import queue
+import re
+import selectors
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import shelf_db
+
+DEFAULT_WORKERS = 8
+IDLE_TIMEOUT = 5  # seconds a keep-alive connection may sit idle, or a request may stall
+MAX_LIMIT = 1000
+
+
+# -----------------------------
+# Server
+# -----------------------------
+class PooledHTTPServer(HTTPServer):
+    """HTTP server that runs each request, not each connection, on a worker pool.
+
+    Between requests a keep-alive connection waits in a selector instead of
+    holding a worker, so far more clients than workers are served fairly.
+    Every worker keeps its own SQLite connection (see shelf_db.connect_db),
+    so the pool size is also the number of open database connections.
+    """
+
+    def __init__(self, address, handler, workers=DEFAULT_WORKERS):
+        super().__init__(address, handler)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shelf-worker")
+        self.idle = selectors.DefaultSelector()
+        self.parked = queue.SimpleQueue()  # connections handed back by workers
+        self.wakeup, self.wakeup_sender = socket.socketpair()
+        self.wakeup.setblocking(False)
+        self.wakeup_sender.setblocking(False)
+        self.idle.register(self.wakeup, selectors.EVENT_READ)
+        self.closing = False
+        self.watcher = threading.Thread(target=self.watch_idle, name="shelf-idle", daemon=True)
+        self.watcher.start()
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.open_connection, request, client_address)
+
+    def open_connection(self, request, client_address):
+        """Set up a handler for a new connection and answer its first request."""
+        try:
+            handler = self.RequestHandlerClass(request, client_address, self)
+        except Exception:
+            self.handle_error(request, client_address)
+            self.shutdown_request(request)
+            return
+        self.serve_request(handler)
+
+    def serve_request(self, handler):
+        """Answer one request, then park the connection until the next one arrives."""
+        try:
+            handler.handle_one_request()
+            if not handler.close_connection:
+                if request_waiting(handler):
+                    self.pool.submit(self.serve_request, handler)  # pipelined: queue it fairly
+                else:
+                    self.parked.put(handler)
+                    try:
+                        self.wakeup_sender.send(b"\0")
+                    except OSError:
+                        pass  # wakeups already pending, or the server is closing
+                return
+        except Exception:
+            self.handle_error(handler.request, handler.client_address)
+        self.close_handler(handler)
+
+    def watch_idle(self):
+        """Hand parked connections to the pool when readable; close idle ones."""
+        while not self.closing:
+            for key, _ in self.idle.select(timeout=1.0):
+                now = time.monotonic()
+                if key.fileobj is self.wakeup:
+                    try:
+                        while self.wakeup.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    while not self.parked.empty():
+                        handler = self.parked.get()
+                        self.idle.register(handler.connection, selectors.EVENT_READ, (handler, now))
+                else:
+                    self.idle.unregister(key.fileobj)
+                    self.pool.submit(self.serve_request, key.data[0])
+            now = time.monotonic()
+            for key in list(self.idle.get_map().values()):
+                if key.data and now - key.data[1] > IDLE_TIMEOUT:
+                    self.idle.unregister(key.fileobj)
+                    self.close_handler(key.data[0])
+
+    def close_handler(self, handler):
+        """Flush and close a connection's streams and socket."""
+        try:
+            handler.finish()
+        except OSError:
+            pass
+        self.shutdown_request(handler.request)
+
+    def server_close(self):
+        self.closing = True
+        self.wakeup_sender.close()
+        self.watcher.join()
+        for key in list(self.idle.get_map().values()):
+            if key.data:
+                self.close_handler(key.data[0])
+        self.idle.close()
+        self.wakeup.close()
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def request_waiting(handler):
+    """Return True if the client has already sent its next request (pipelining)."""
+    handler.connection.setblocking(False)
+    try:
+        return bool(handler.rfile.peek(1))
+    except OSError:
+        return False
+    finally:
+        handler.connection.settimeout(handler.timeout)
+
+
+class NotFound(Exception):
+    """Raised by a route when the requested record does not exist."""
+
+
+# -----------------------------
+# Routes
+# -----------------------------
+def book_json(row):
+    """Turn a book row into a JSON-ready dict."""
+    return dict(zip(shelf_db.EXPORT_COLUMNS, row))
+
+
+def limit_param(query, default):
+    """Read the limit parameter from a query string, clamped to 1..MAX_LIMIT."""
+    limit = int(query.get("limit", [str(default)])[0])
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def page_params(query):
+    """Read after/limit paging parameters from a query string."""
+    after = int(query.get("after", ["0"])[0])
+    return after, limit_param(query, shelf_db.PAGE_SIZE)
+
+
+def basket_from(body):
+    """Turn {"items": [{"id": ..., "qty": ...}]} into a (book ID, qty) basket."""
+    items = body.get("items")
+    if not isinstance(items, list) or not items:
+        raise ValueError("Body must have a non-empty 'items' list.")
+    if not all(isinstance(item, dict) for item in items):
+        raise ValueError("Each item must be an object with 'id' and 'qty'.")
+    return [(shelf_db.check_id(str(item.get("id", ""))),
+             shelf_db.check_quantity(str(item.get("qty", "")))) for item in items]
+
+
+def list_books(conn, query, body):
+    """GET /books?after=ID&limit=N: a page of books in ID order."""
+    after, limit = page_params(query)
+    rows = shelf_db.fetch_page("book", after, limit)
+    return 200, {"books": [dict(zip(("id", "title", "author", "country"), row)) for row in rows]}
+
+
+def get_book(conn, query, body, book_id):
+    """GET /books/ID: one book with its author."""
+    row = shelf_db.get_book(int(book_id))
+    if row is None:
+        raise NotFound("No book found.")
+    return 200, book_json(row)
+
+
+def add_book(conn, query, body):
+    """POST /books: add a book (omit id to auto-assign)."""
+    with conn:
+        result = shelf_db.run_operation(conn, {**body, "op": "add-book"})
+    return 201, result
+
+
+def update_book(conn, query, body, book_id):
+    """PATCH /books/ID: change title, author_id and/or qty."""
+    with conn:
+        result = shelf_db.run_operation(conn, {**body, "op": "update", "id": book_id})
+    return 200, result
+
+
+def delete_book(conn, query, body, book_id):
+    """DELETE /books/ID: remove a book."""
+    with conn:
+        result = shelf_db.run_operation(conn, {"op": "delete", "id": book_id})
+    return 200, result
+
+
+def list_authors(conn, query, body):
+    """GET /authors?after=ID&limit=N: a page of authors in ID order."""
+    after, limit = page_params(query)
+    rows = shelf_db.fetch_page("author", after, limit)
+    return 200, {"authors": [dict(zip(("id", "name", "country"), row)) for row in rows]}
+
+
+def get_author(conn, query, body, author_id):
+    """GET /authors/ID: one author."""
+    author = shelf_db.get_author(int(author_id), conn)
+    if author is None:
+        raise NotFound("No author found.")
+    return 200, {"id": int(author_id), "name": author[0], "country": author[1]}
+
+
+def add_author(conn, query, body):
+    """POST /authors: add an author (omit id to auto-assign)."""
+    with conn:
+        result = shelf_db.run_operation(conn, {**body, "op": "add-author"})
+    return 201, result
+
+
+def search(conn, query, body):
+    """GET /search?q=KEYWORD&limit=N: ranked book search."""
+    keyword = query.get("q", [""])[0].strip()
+    limit = limit_param(query, 100)
+    rows = shelf_db.cached_search(keyword, conn)
+    return 200, {"results": [book_json(row) for row, _ in zip(rows, range(limit))]}
+
+
+def complete(conn, query, body):
+    """GET /complete?q=PREFIX: title and author-name suggestions."""
+    prefix = query.get("q", [""])[0]
+    matches = shelf_db.autocomplete(prefix, conn=conn)
+    return 200, {"suggestions": [{"kind": k, "id": i, "text": t} for k, i, t in matches]}
+
+
+def fuzzy(conn, query, body):
+    """GET /fuzzy?q=TEXT: typo-tolerant suggestions."""
+    matches = shelf_db.fuzzy_search(query.get("q", [""])[0], conn=conn)
+    return 200, {"suggestions": [{"kind": k, "id": i, "text": t, "distance": d}
+                                 for k, i, t, d in matches]}
+
+
+def sell(conn, query, body):
+    """POST /sell: take a basket of items off the shelf atomically."""
+    shelf_db.sell_items(basket_from(body))
+    return 200, {"ok": True}
+
+
+def restock(conn, query, body):
+    """POST /restock: add a basket of items to stock."""
+    shelf_db.restock_items(basket_from(body))
+    return 200, {"ok": True}
+
+
+# (method, path pattern) -> handler; captured groups are passed as arguments
+ROUTES = [
+    ("GET", r"/books", list_books),
+    ("POST", r"/books", add_book),
+    ("GET", r"/books/(\d+)", get_book),
+    ("PATCH", r"/books/(\d+)", update_book),
+    ("DELETE", r"/books/(\d+)", delete_book),
+    ("GET", r"/authors", list_authors),
+    ("POST", r"/authors", add_author),
+    ("GET", r"/authors/(\d+)", get_author),
+    ("GET", r"/search", search),
+    ("GET", r"/complete", complete),
+    ("GET", r"/fuzzy", fuzzy),
+    ("POST", r"/sell", sell),
+    ("POST", r"/restock", restock),
+]
+
+
+# -----------------------------
+# Request handling
+# -----------------------------
+class ShelfRequestHandler(BaseHTTPRequestHandler):
+    """Dispatch JSON requests to ROUTES over persistent HTTP/1.1 connections."""
+
+    protocol_version = "HTTP/1.1"
+    timeout = IDLE_TIMEOUT
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def __init__(self, request, client_address, server):
+        # Only set up the streams: PooledHTTPServer calls handle_one_request()
+        # for each request and finish() when the connection closes.
+        self.request, self.client_address, self.server = request, client_address, server
+        self.close_connection = True
+        self.setup()
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_PATCH(self):
+        self.dispatch("PATCH")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def dispatch(self, method):
+        """Route a request and send back the handler's JSON, or an error."""
+        url = urlsplit(self.path)
+        try:
+            body = self.read_body()
+            for route_method, pattern, handler in ROUTES:
+                match = re.fullmatch(pattern, url.path.rstrip("/") or "/")
+                if match and route_method == method:
+                    status, payload = handler(shelf_db.connect_db(), parse_qs(url.query),
+                                              body, *match.groups())
+                    break
+            else:
+                status, payload = 404, {"error": "Not found."}
+        except NotFound as e:
+            status, payload = 404, {"error": str(e)}
+        except ValueError as e:
+            status, payload = 400, {"error": str(e)}
+        except sqlite3.Error as e:
+            status, payload = 500, {"error": f"DB error: {e}"}
+        self.send_json(status, payload)
+
+    def read_body(self):
+        """Return the parsed JSON request body, or {} if there is none."""
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        body = json.loads(self.rfile.read(length))
+        if not isinstance(body, dict):
+            raise ValueError("Request body must be a JSON object.")
+        return body
+
+    def send_json(self, status, payload):
+        """Send a JSON response with an explicit length so the connection stays open."""
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # keep the console quiet under load
+
+
+def main(argv=None):
+    """Run the API server until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve the eBookstore over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="worker threads, each with its own database connection")
+    args = parser.parse_args(argv)
+
+    shelf_db.setup_db()
+    server = PooledHTTPServer((args.host, args.port), ShelfRequestHandler, args.workers)
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,84 +3,12 @@ eBookstore Management System CLI
 Manages books and authors using an SQLite database.
 """
 
+import argparse
+import json
 import sqlite3
+import sys
 
-DB_FILE = "ebookstore.db"
-
-
-# -----------------------------
-# Database helpers
-# -----------------------------
-def connect_db():
-    """Return a database connection."""
-    return sqlite3.connect(DB_FILE)
-
-
-def setup_db():
-    """Create tables and populate with sample data if empty."""
-    with connect_db() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS author (
-                id INTEGER PRIMARY KEY,
-                name TEXT NOT NULL,
-                country TEXT NOT NULL
-            )
-        """)
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS book (
-                id INTEGER PRIMARY KEY,
-                title TEXT NOT NULL,
-                author_id INTEGER NOT NULL,
-                qty INTEGER NOT NULL,
-                FOREIGN KEY (author_id) REFERENCES author(id)
-            )
-        """)
-        cur.execute("SELECT COUNT(*) FROM author")
-        if cur.fetchone()[0] == 0:
-            authors = [
-                (1290, "J.K. Rowling", "England"),
-                (8937, "Charles Dickens", "England"),
-                (2356, "C.S. Lewis", "Ireland"),
-                (6380, "J.R.R. Tolkien", "South Africa"),
-                (5620, "Lewis Carroll", "England")
-            ]
-            cur.executemany("INSERT INTO author VALUES (?, ?, ?)", authors)
-        cur.execute("SELECT COUNT(*) FROM book")
-        if cur.fetchone()[0] == 0:
-            books = [
-                (3001, "A Tale of Two Cities", 8937, 30),
-                (3002, "Harry Potter and the Philosopher's Stone", 1290, 40),
-                (3003, "The Lion, the Witch and the Wardrobe", 2356, 25),
-                (3004, "The Lord of the Rings", 6380, 37),
-                (3005, "Alice’s Adventures in Wonderland", 5620, 12)
-            ]
-            cur.executemany("INSERT INTO book VALUES (?, ?, ?, ?)", books)
-        conn.commit()
-
-
-# -----------------------------
-# Input validation
-# -----------------------------
-def check_id(input_str):
-    """Validate input as a 4-digit integer ID."""
-    if input_str.isdigit() and len(input_str) == 4:
-        return int(input_str)
-    raise ValueError("ID must be a 4-digit number.")
-
-
-def check_quantity(input_str):
-    """Validate input as a non-negative integer."""
-    if input_str.isdigit() and int(input_str) >= 0:
-        return int(input_str)
-    raise ValueError("Quantity must be a non-negative number.")
-
-
-def get_non_empty_input(input_str, field_name):
-    """Ensure input is not empty."""
-    if input_str.strip() == "":
-        raise ValueError(f"{field_name} cannot be empty.")
-    return input_str.strip()
+import shelf_db
 
 
 # -----------------------------
@@ -89,182 +17,401 @@ def get_non_empty_input(input_str, field_name):
 def add_author():
     """Add a new author to the database."""
     try:
-        author_id = check_id(input("Enter a 4-digit author ID: "))
-        name = get_non_empty_input(input("Author's name: "), "Name")
-        country = get_non_empty_input(input("Country: "), "Country")
+        author_id = shelf_db.check_optional_id(input("Author ID (blank to auto-assign): "))
+        name = shelf_db.get_non_empty_input(input("Author's name: "), "Name")
+        country = shelf_db.get_non_empty_input(input("Country: "), "Country")
+        author_id = shelf_db.add_author(name, country, author_id)
+        print(f"✅ Author '{name}' added with ID {author_id}.")
     except ValueError as ve:
         print(f"Oops! {ve}")
-        return
-
-    try:
-        with connect_db() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO author (id, name, country) VALUES (?, ?, ?)",
-                (author_id, name, country)
-            )
-            conn.commit()
-            print(f"✅ Author '{name}' added.")
-    except sqlite3.IntegrityError:
-        print("Author ID already exists.")
+    except sqlite3.Error as e:
+        print(f"DB error: {e}")
 
 
 def add_book():
     """Add a new book to the database."""
     try:
-        book_id = check_id(input("Type a 4-digit book ID: "))
-        title = get_non_empty_input(input("Book title: "), "Title")
-        author_id = check_id(input("Author ID (must exist): "))
-        qty = check_quantity(input("Quantity of copies: "))
+        book_id = shelf_db.check_optional_id(input("Book ID (blank to auto-assign): "))
+        title = shelf_db.get_non_empty_input(input("Book title: "), "Title")
+        author_id = shelf_db.check_id(input("Author ID (must exist): "))
+        qty = shelf_db.check_quantity(input("Quantity of copies: "))
+        book_id = shelf_db.add_book(title, author_id, qty, book_id)
+        print(f"📚 '{title}' added successfully with ID {book_id}!")
     except ValueError as ve:
         print(f"Oops! {ve}")
-        return
-
-    try:
-        with connect_db() as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT id FROM author WHERE id = ?", (author_id,))
-            if not cur.fetchone():
-                print("Author ID not found. Add author first.")
-                return
-            cur.execute(
-                "INSERT INTO book (id, title, author_id, qty) VALUES (?, ?, ?, ?)",
-                (book_id, title, author_id, qty)
-            )
-            conn.commit()
-            print(f"📚 '{title}' added successfully!")
-    except sqlite3.IntegrityError:
-        print("Book ID already exists.")
+    except sqlite3.Error as e:
+        print(f"DB error: {e}")
 
 
 def update_book():
     """Update book details or its author."""
     try:
-        book_id = check_id(input("Enter the book ID to update: "))
+        book_id = shelf_db.check_id(input("Enter the book ID to update: "))
     except ValueError as ve:
         print(f"Oops! {ve}")
         return
 
-    with connect_db() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT book.title, author.id, author.name, author.country, book.qty
-            FROM book
-            INNER JOIN author ON book.author_id = author.id
-            WHERE book.id = ?
-        """, (book_id,))
-        result = cur.fetchone()
-
-        if not result:
-            print("No book found.")
-            return
+    # Read phase: take a snapshot of the record
+    record = shelf_db.get_book_record(book_id)
+    author = record and shelf_db.get_author(record[1])
+    if not author:
+        print("No book found.")
+        return
+    title, author_id, qty = record
+    author_name, author_country = author
 
-        title, author_id, author_name, author_country, qty = result
-        print(f"\nCurrent details:\nTitle: {title}\nQty: {qty}\nAuthor: {author_name} ({author_country})")
-        print("\n1. Quantity\n2. Title\n3. Author details")
-        choice = input("Choice [1-3]: ").strip() or "1"
+    # Input phase: nothing is held open in the database while the clerk types
+    print(f"\nCurrent details:\nTitle: {title}\nQty: {qty}\nAuthor: {author_name} ({author_country})")
+    print("\n1. Quantity\n2. Title\n3. Author details")
+    choice = input("Choice [1-3]: ").strip() or "1"
 
-        try:
-            if choice == "1":
-                new_qty = check_quantity(input("Enter new quantity: "))
-                cur.execute("UPDATE book SET qty = ? WHERE id = ?", (new_qty, book_id))
-                conn.commit()
-                print("✅ Quantity updated!")
-            elif choice == "2":
-                new_title = get_non_empty_input(input("Enter new title: "), "Title")
-                cur.execute("UPDATE book SET title = ? WHERE id = ?", (new_title, book_id))
-                conn.commit()
-                print("✅ Title updated!")
-            elif choice == "3":
-                new_name = input(f"Author name [{author_name}]: ").strip() or author_name
-                new_country = input(f"Author country [{author_country}]: ").strip() or author_country
-                cur.execute("UPDATE author SET name = ?, country = ? WHERE id = ?",
-                            (new_name, new_country, author_id))
-                conn.commit()
-                print("✅ Author updated!")
-            else:
-                print("Invalid choice.")
-        except ValueError as ve:
-            print(f"Oops! {ve}")
-        except sqlite3.Error as e:
-            print(f"DB error: {e}")
+    # Write phase: a short transaction that only applies if the snapshot still holds
+    snapshot = {"title": title, "author_id": author_id, "qty": qty}
+    try:
+        if choice == "1":
+            new_qty = shelf_db.check_quantity(input("Enter new quantity: "))
+            shelf_db.update_book(book_id, qty=new_qty, expect=snapshot)
+            print("✅ Quantity updated!")
+        elif choice == "2":
+            new_title = shelf_db.get_non_empty_input(input("Enter new title: "), "Title")
+            shelf_db.update_book(book_id, title=new_title, expect=snapshot)
+            print("✅ Title updated!")
+        elif choice == "3":
+            new_name = input(f"Author name [{author_name}]: ").strip() or author_name
+            new_country = input(f"Author country [{author_country}]: ").strip() or author_country
+            shelf_db.update_author(author_id, name=new_name, country=new_country,
+                                   expect={"name": author_name, "country": author_country})
+            print("✅ Author updated!")
+        else:
+            print("Invalid choice.")
+    except ValueError as ve:
+        print(f"Oops! {ve}")
+    except sqlite3.Error as e:
+        print(f"DB error: {e}")
 
 
 def delete_book():
     """Delete a book by ID."""
     try:
-        book_id = check_id(input("Book ID to delete: "))
+        shelf_db.delete_book(shelf_db.check_id(input("Book ID to delete: ")))
+        print("✅ Book removed.")
     except ValueError as ve:
         print(f"Oops! {ve}")
-        return
-
-    try:
-        with connect_db() as conn:
-            cur = conn.cursor()
-            cur.execute("DELETE FROM book WHERE id = ?", (book_id,))
-            if cur.rowcount == 0:
-                print("No book found.")
-            else:
-                conn.commit()
-                print("✅ Book removed.")
     except sqlite3.Error as e:
         print(f"DB error: {e}")
 
 
+def autocomplete_books():
+    """Suggest titles and author names as the clerk types a prefix."""
+    prefix = input("Start of a title or author name: ").strip()
+    matches = shelf_db.autocomplete(prefix)
+    if not matches:
+        print("No suggestions.")
+    for kind, ref_id, text in matches:
+        print(f"{kind.title()} {ref_id}: {text}")
+
+
 def search_books():
     """Search books by title, author, or ID."""
     keyword = input("Keyword to search: ").strip()
-    with connect_db() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT book.id, book.title, author.name, author.country, book.qty
-            FROM book
-            JOIN author ON book.author_id = author.id
-            WHERE book.title LIKE ? OR author.name LIKE ? OR CAST(book.id AS TEXT) LIKE ?
-        """, (f"%{keyword}%", f"%{keyword}%", f"%{keyword}%"))
-        results = cur.fetchall()
-
-    if results:
-        print("\nSearch results:")
-        for book in results:
-            print(f"ID: {book[0]} | Title: {book[1]} | Author: {book[2]} ({book[3]}) | Qty: {book[4]}")
-    else:
+    found = False
+    for book in shelf_db.cached_search(keyword):
+        if not found:
+            print("\nSearch results:")
+            found = True
+        print(f"ID: {book[0]} | Title: {book[1]} | Author: {book[2]} ({book[3]}) | Qty: {book[4]}")
+    if not found:
         print("No matches found.")
+        try:
+            suggestions = shelf_db.fuzzy_search(keyword, limit=5)
+        except ValueError:
+            suggestions = []
+        for kind, ref_id, text, _ in suggestions:
+            print(f"Did you mean {kind} {ref_id}: {text}?")
+
+
+def browse(table, heading, show_row):
+    """Page through a table with next/prev/jump commands."""
+    page_size = shelf_db.PAGE_SIZE
+    page = shelf_db.fetch_page(table, 0, page_size)
+    if not page:
+        print(f"No {table}s in DB.")
+        return
+
+    while True:
+        print(f"\n{heading} --------------------------------------------------")
+        for row in page:
+            show_row(row)
+        choice = input("[n]ext  [p]rev  [j]ump to ID  [s]ize  [q]uit: ").strip().lower() or "n"
+        if choice == "q":
+            return
+        if choice == "n":
+            rows = shelf_db.fetch_page(table, page[-1][0], page_size)
+        elif choice == "p":
+            rows = shelf_db.fetch_page(table, page[0][0], page_size, before=True)
+        elif choice == "j":
+            try:
+                anchor = shelf_db.check_id(input("Jump to ID: ")) - 1
+                rows = shelf_db.fetch_page(table, anchor, page_size)
+            except ValueError as ve:
+                print(f"Oops! {ve}")
+                continue
+        elif choice == "s":
+            try:
+                page_size = max(1, shelf_db.check_quantity(input("Rows per page: ")))
+            except ValueError as ve:
+                print(f"Oops! {ve}")
+                continue
+            rows = shelf_db.fetch_page(table, page[0][0] - 1, page_size)
+        else:
+            print("Invalid choice.")
+            continue
+        if rows:
+            page = rows
+        else:
+            print("No more records that way.")
 
 
 def view_all_books():
-    """Display all books with authors."""
-    with connect_db() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT book.title, author.name, author.country
-            FROM book
-            JOIN author ON book.author_id = author.id
-            ORDER BY book.id
-        """)
-        results = cur.fetchall()
-
-    if results:
-        print("\nAll books --------------------------------------------------")
-        for title, author, country in results:
-            print(f"Title: {title}\nAuthor: {author}\nCountry: {country}\n----------------------------------------------------")
-    else:
-        print("No books in DB.")
+    """Display all books with authors, one page at a time."""
+    browse("book", "All books", lambda row: print(
+        f"ID: {row[0]}\nTitle: {row[1]}\nAuthor: {row[2]}\nCountry: {row[3]}\n"
+        "----------------------------------------------------"))
 
 
 def view_all_authors():
-    """Display all authors."""
-    with connect_db() as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT id, name, country FROM author ORDER BY id")
-        results = cur.fetchall()
+    """Display all authors, one page at a time."""
+    browse("author", "All authors", lambda row: print(
+        f"ID: {row[0]}\nName: {row[1]}\nCountry: {row[2]}\n"
+        "----------------------------------------------------"))
+
+
+def show_stats():
+    """Print query and cache statistics."""
+    shelf_db.print_query_stats()
+    print()
+    shelf_db.print_cache_stats()
+
+
+# -----------------------------
+# Sales and restocking
+# -----------------------------
+def read_basket():
+    """Prompt for (book ID, quantity) pairs until a blank ID is entered."""
+    basket = []
+    while True:
+        raw_id = input("Book ID (blank to finish): ").strip()
+        if not raw_id:
+            return basket
+        basket.append((shelf_db.check_id(raw_id), shelf_db.check_quantity(input("Quantity: "))))
+
 
-    if results:
-        print("\nAll authors --------------------------------------------------")
-        for aid, name, country in results:
-            print(f"ID: {aid}\nName: {name}\nCountry: {country}\n----------------------------------------------------")
-    else:
-        print("No authors in DB.")
+def sell_books():
+    """Sell a basket of books."""
+    try:
+        basket = read_basket()
+        if basket:
+            shelf_db.sell_items(basket)
+            print(f"✅ Sold {sum(qty for _, qty in basket)} copies.")
+    except ValueError as ve:
+        print(f"Oops! {ve}")
+    except sqlite3.Error as e:
+        print(f"DB error: {e}")
+
+
+def restock_books():
+    """Add delivered copies to stock."""
+    try:
+        basket = read_basket()
+        if basket:
+            shelf_db.restock_items(basket)
+            print(f"✅ Restocked {sum(qty for _, qty in basket)} copies.")
+    except ValueError as ve:
+        print(f"Oops! {ve}")
+    except sqlite3.Error as e:
+        print(f"DB error: {e}")
+
+
+# -----------------------------
+# Command-line interface
+# -----------------------------
+def emit(obj):
+    """Write one JSON result line to stdout."""
+    print(json.dumps(obj, ensure_ascii=False))
+
+
+def cli_write(args):
+    """Run a single add/update/delete operation in its own transaction."""
+    op = {key: value for key, value in vars(args).items() if key not in ("command", "handler")}
+    with shelf_db.connect_db() as conn:
+        result = shelf_db.run_operation(conn, {"op": args.command, **op})
+    emit({"ok": True, **result})
+
+
+def cli_search(args):
+    """Stream search results as JSON lines."""
+    for row in shelf_db.cached_search(args.keyword.strip()):
+        emit(dict(zip(shelf_db.EXPORT_COLUMNS, row)))
+
+
+def cli_complete(args):
+    """Print autocomplete suggestions for a prefix as JSON lines."""
+    for kind, ref_id, text in shelf_db.autocomplete(args.prefix, args.limit):
+        emit({"kind": kind, "id": ref_id, "text": text})
+
+
+def cli_fuzzy(args):
+    """Print near matches for a misspelled title or name as JSON lines."""
+    for kind, ref_id, text, distance in shelf_db.fuzzy_search(args.text, args.limit):
+        emit({"kind": kind, "id": ref_id, "text": text, "distance": distance})
+
+
+def cli_list(args):
+    """Stream books (or authors) in ID order as JSON lines."""
+    table = "author" if args.authors else "book"
+    columns = ("id", "name", "country") if args.authors else shelf_db.EXPORT_COLUMNS[:4]
+    anchor, remaining = args.after, args.limit
+    while remaining is None or remaining > 0:
+        size = shelf_db.EXPORT_BATCH_SIZE
+        if remaining is not None:
+            size = min(remaining, size)
+        page = shelf_db.fetch_page(table, anchor, size)
+        if not page:
+            break
+        for row in page:
+            emit(dict(zip(columns, row)))
+        anchor = page[-1][0]
+        if remaining is not None:
+            remaining -= len(page)
+
+
+def cli_import(args):
+    """Import a CSV or JSONL file and report the totals."""
+    emit({"ok": True, **shelf_db.import_file(args.file, args.table, args.batch_size)})
+
+
+def cli_export(args):
+    """Export the catalog and report how many books were written."""
+    emit({"ok": True, "exported": shelf_db.export_catalog(args.file, args.batch_size)})
+
+
+def cli_batch(args):
+    """Run every operation in a JSONL file over one connection and one transaction.
+
+    If any operation fails, nothing is committed.
+    """
+    results = []
+    with shelf_db.connect_db() as conn:
+        for line_no, op in shelf_db.read_records(args.file):
+            if not isinstance(op, dict):
+                raise ValueError(f"Line {line_no}: malformed operation.")
+            try:
+                results.append({"line": line_no, **shelf_db.run_operation(conn, op)})
+            except (ValueError, sqlite3.Error) as e:
+                raise ValueError(f"Line {line_no}: {e}") from None
+    for result in results:
+        emit({"ok": True, **result})
+
+
+def cli_migrate(args):
+    """Apply pending migrations, or with --dry-run list them with estimates."""
+    pending = shelf_db.pending_migrations()
+    if not args.dry_run:
+        shelf_db.setup_db()
+    for version, name, seconds in pending:
+        emit({"version": version, "name": name, "estimated_seconds": round(seconds, 3),
+              "applied": not args.dry_run})
+
+
+def build_parser():
+    """Build the argument parser for the non-interactive commands."""
+    parser = argparse.ArgumentParser(
+        description="eBookstore management. Run without a command for the interactive menu.")
+    commands = parser.add_subparsers(dest="command")
+
+    add_author_cmd = commands.add_parser("add-author", help="add an author")
+    add_author_cmd.add_argument("--id", default="", help="author ID (blank to auto-assign)")
+    add_author_cmd.add_argument("--name", required=True)
+    add_author_cmd.add_argument("--country", required=True)
+    add_author_cmd.set_defaults(handler=cli_write)
+
+    add_book_cmd = commands.add_parser("add-book", help="add a book")
+    add_book_cmd.add_argument("--id", default="", help="book ID (blank to auto-assign)")
+    add_book_cmd.add_argument("--title", required=True)
+    add_book_cmd.add_argument("--author-id", required=True)
+    add_book_cmd.add_argument("--qty", required=True)
+    add_book_cmd.set_defaults(handler=cli_write)
+
+    update_cmd = commands.add_parser("update", help="change a book's title, author or quantity")
+    update_cmd.add_argument("id")
+    update_cmd.add_argument("--title")
+    update_cmd.add_argument("--author-id")
+    update_cmd.add_argument("--qty")
+    update_cmd.set_defaults(handler=cli_write)
+
+    delete_cmd = commands.add_parser("delete", help="delete a book")
+    delete_cmd.add_argument("id")
+    delete_cmd.set_defaults(handler=cli_write)
+
+    search_cmd = commands.add_parser("search", help="search books by title, author or ID")
+    search_cmd.add_argument("keyword")
+    search_cmd.set_defaults(handler=cli_search)
+
+    complete_cmd = commands.add_parser("complete", help="suggest titles and author names for a prefix")
+    complete_cmd.add_argument("prefix")
+    complete_cmd.add_argument("--limit", type=int, default=shelf_db.AUTOCOMPLETE_LIMIT)
+    complete_cmd.set_defaults(handler=cli_complete)
+
+    fuzzy_cmd = commands.add_parser("fuzzy", help="typo-tolerant search of titles and author names")
+    fuzzy_cmd.add_argument("text")
+    fuzzy_cmd.add_argument("--limit", type=int, default=shelf_db.FUZZY_LIMIT)
+    fuzzy_cmd.set_defaults(handler=cli_fuzzy)
+
+    list_cmd = commands.add_parser("list", help="list books (or authors) in ID order")
+    list_cmd.add_argument("--authors", action="store_true")
+    list_cmd.add_argument("--after", type=int, default=0, help="start after this ID")
+    list_cmd.add_argument("--limit", type=int)
+    list_cmd.set_defaults(handler=cli_list)
+
+    import_cmd = commands.add_parser("import", help="bulk import a CSV or JSONL file")
+    import_cmd.add_argument("table", choices=sorted(shelf_db.INSERT_SQL))
+    import_cmd.add_argument("file")
+    import_cmd.add_argument("--batch-size", type=int, default=shelf_db.IMPORT_BATCH_SIZE)
+    import_cmd.set_defaults(handler=cli_import)
+
+    export_cmd = commands.add_parser("export", help="export the catalog to .csv, .jsonl or .txt")
+    export_cmd.add_argument("file")
+    export_cmd.add_argument("--batch-size", type=int, default=shelf_db.EXPORT_BATCH_SIZE)
+    export_cmd.set_defaults(handler=cli_export)
+
+    batch_cmd = commands.add_parser("batch", help="run a JSONL file of operations in one transaction")
+    batch_cmd.add_argument("file")
+    batch_cmd.set_defaults(handler=cli_batch)
+
+    migrate_cmd = commands.add_parser("migrate", help="apply pending schema migrations")
+    migrate_cmd.add_argument("--dry-run", action="store_true",
+                             help="list pending migrations and estimated durations only")
+    migrate_cmd.set_defaults(handler=cli_migrate)
+    return parser
+
+
+def main(argv=None):
+    """Run one command, or the interactive menu when none is given.
+
+    Returns the exit code: 0 on success, 1 if the operation failed.
+    """
+    args = build_parser().parse_args(argv)
+    if args.command != "migrate":
+        shelf_db.setup_db()
+    if args.command is None:
+        menu()
+        return 0
+    try:
+        args.handler(args)
+    except (ValueError, OSError, sqlite3.Error) as e:
+        emit({"ok": False, "error": str(e)})
+        return 1
+    return 0
 
 
 # -----------------------------
@@ -275,11 +422,14 @@ def menu():
     while True:
         print("\n=== eBookstore System ===")
         print("1. Add book  2. Update book  3. Remove book  4. Search books")
-        print("5. View all books  6. Add author  7. View all authors  0. Exit")
+        print("5. View all books  6. Add author  7. View all authors  8. Sell books")
+        print("9. Restock books  10. Stats  11. Autocomplete  0. Exit")
         choice = input("Choice: ").strip()
         options = {
             "1": add_book, "2": update_book, "3": delete_book, "4": search_books,
-            "5": view_all_books, "6": add_author, "7": view_all_authors, "0": exit
+            "5": view_all_books, "6": add_author, "7": view_all_authors,
+            "8": sell_books, "9": restock_books, "10": show_stats,
+            "11": autocomplete_books, "0": exit
         }
         action = options.get(choice)
         if action:
@@ -292,5 +442,4 @@ def menu():
 # Run program
 # -----------------------------
 if __name__ == "__main__":
-    setup_db()
-    menu()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+eBookstore group-commit writer
+Funnels writes from many threads through one connection and commits them in groups.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import shelf_db
+
+GROUP_MAX_OPS = 500
+GROUP_MAX_DELAY = 0.005  # seconds the first write in a group may wait for company
+
+
+# -----------------------------
+# Write queue
+# -----------------------------
+class WriteQueue:
+    """A single writer thread that commits queued operations in groups.
+
+    Producers call submit() (or a helper such as update_book()) from any
+    thread and get a Future back. The writer takes up to max_ops operations,
+    waiting at most max_delay seconds after the first, and runs them in one
+    transaction, so the whole group pays for a single commit.
+
+    Each operation runs in its own savepoint: one that raises is rolled back
+    on its own and its Future gets the exception (e.g. ValueError for a
+    duplicate ID), while the rest of the group still commits. Only a failed
+    BEGIN or COMMIT fails the whole group. Futures are only resolved once the
+    commit has succeeded.
+    """
+
+    def __init__(self, max_ops=GROUP_MAX_OPS, max_delay=GROUP_MAX_DELAY):
+        self.max_ops = max_ops
+        self.max_delay = max_delay
+        self.stats = {"groups": 0, "ops": 0}
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="shelf-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(conn, *args, **kwargs) and return a Future for its result."""
+        future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("Write queue is closed.")
+            self._queue.put((future, func, args, kwargs))
+        return future
+
+    def add_author(self, author_id, name, country):
+        """Queue an author insert; the Future resolves to the author ID."""
+        return self.submit(shelf_db.insert_author, author_id, name, country)
+
+    def add_book(self, book_id, title, author_id, qty):
+        """Queue a book insert; the Future resolves to the book ID."""
+        return self.submit(shelf_db.insert_book, book_id, title, author_id, qty)
+
+    def update_book(self, book_id, title=None, author_id=None, qty=None):
+        """Queue a book update."""
+        return self.submit(shelf_db.edit_book, book_id, title, author_id, qty)
+
+    def delete_book(self, book_id):
+        """Queue a book delete."""
+        return self.submit(shelf_db.remove_book, book_id)
+
+    def close(self):
+        """Commit everything already queued, then stop the writer thread."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        """Writer loop: gather a group, run it, repeat until closed."""
+        conn = shelf_db.connect_db()
+        try:
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                if item is None:
+                    break
+                group = [item]
+                deadline = time.monotonic() + self.max_delay
+                while len(group) < self.max_ops:
+                    try:
+                        item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    group.append(item)
+                self._commit_group(conn, group)
+        finally:
+            shelf_db.close_db()
+
+    def _commit_group(self, conn, group):
+        """Run a group of operations in one transaction and resolve their Futures."""
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for future, func, args, kwargs in group:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT op")
+                pending = len(conn.pending_completions)
+                try:
+                    outcomes.append((future, func(conn, *args, **kwargs), None))
+                except Exception as e:
+                    # Only this operation is undone; if SQLite has already
+                    # rolled back the whole transaction, ROLLBACK TO fails and
+                    # the group fails below.
+                    conn.execute("ROLLBACK TO op")
+                    del conn.pending_completions[pending:]
+                    outcomes.append((future, None, e))
+                conn.execute("RELEASE op")
+            conn.commit()
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            for future, *_ in group:
+                if future.running() or future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+            return
+        self.stats["groups"] += 1
+        self.stats["ops"] += len(group)
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
@@ -0,0 +1,74 @@
+"""
+Query plan checks
+Runs every hot operation against a scratch database, collects the SQL it sends,
+and fails if EXPLAIN QUERY PLAN shows a full scan of book or author.
+"""
+
+import re
+
+import pytest
+
+import shelf_db
+
+# Plan steps that read a whole base table, with or without an index
+FULL_SCAN = re.compile(r"^SCAN (book|author)\b")
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    """A fresh, migrated and seeded database for this test only."""
+    monkeypatch.setattr(shelf_db, "DB_FILE", str(tmp_path / "plans.db"))
+    shelf_db.setup_db()
+    shelf_db.reset_completions()
+    yield shelf_db.connect_db()
+    shelf_db.close_db()
+    shelf_db.reset_completions()
+    shelf_db._author_cache.clear()
+    shelf_db._search_cache.clear()
+
+
+def run_hot_operations():
+    """Exercise the lookups, searches and writes clerks and the API run all day."""
+    author_id = shelf_db.add_author("Ngũgĩ wa Thiong'o", "Kenya")
+    book_id = shelf_db.add_book("Petals of Blood", author_id, 4)
+    shelf_db.get_book(book_id)
+    shelf_db.get_books([book_id, 3001, 3002])
+    shelf_db.get_book_record(book_id)
+    shelf_db.get_author(author_id)
+    for query in (str(book_id), "300", "Petals", "ngugi", "blood tale", "1984"):
+        shelf_db.search(query, 10)
+    shelf_db.fuzzy_search("petels of blod")
+    shelf_db.autocomplete("pet")
+    shelf_db.fetch_page("book", 3001)
+    shelf_db.fetch_page("book", 3003, before=True)
+    shelf_db.fetch_page("author", 0)
+    shelf_db.update_book(book_id, qty=6, title="Petals of Blood (2nd ed.)")
+    shelf_db.update_author(author_id, country="Kenya",
+                           expect={"name": "Ngũgĩ wa Thiong'o", "country": "Kenya"})
+    shelf_db.restock_items([(book_id, 5)])
+    shelf_db.sell_items([(book_id, 2)])
+    shelf_db.delete_book(book_id)
+
+
+def test_hot_queries_use_indexes(conn):
+    # Warm up one-off work (autocomplete list build, statement cache) first
+    shelf_db.autocomplete("a")
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        run_hot_operations()
+    finally:
+        conn.set_trace_callback(None)
+
+    checked = set()
+    scans = []
+    for sql in statements:
+        if not re.match(r"\s*(SELECT|WITH|UPDATE|DELETE|INSERT)\b", sql, re.IGNORECASE):
+            continue  # BEGIN/COMMIT, PRAGMAs and trigger bodies
+        if sql in checked:
+            continue
+        checked.add(sql)
+        plan = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+        scans.extend(f"{step}: {' '.join(sql.split())}" for step in plan if FULL_SCAN.match(step))
+    assert checked, "no statements were traced"
+    assert not scans, "full table scans:\n" + "\n".join(scans)